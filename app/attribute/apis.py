@@ -3,23 +3,62 @@ from rest_framework.permissions import AllowAny
 from app.permissions import IsAuth, IsAdmin
 from rest_framework.response import Response
 from rest_framework import status
-from app.models import AttributeGroup
-from .serializers import AttributeGroupSerializer
+from django.db.models import Q
+from django.utils import timezone
+from app.models import AttributeGroup, ProductFamilyAttribute
+from .serializers import AttributeGroupSerializer, PaginationSerializer
+from app.pagination import paginate_by_cursor, paginate_by_page
+from app.product.attributes import queue_attribute_rebuild
 
 
 @api_view(['GET'])
 @permission_classes([IsAuth])
 def get_attribute_groups(request):
-    search = request.GET.get('search')
+    req_ser = PaginationSerializer(data=request.GET)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': 400
+        }, status=400)
+
+    search = req_ser.validated_data.get('search', None)
+    fields = req_ser.validated_data.get('fields', None)
+    page = req_ser.validated_data.get('page', 1)
+    limit = req_ser.validated_data.get('limit', 10)
+    cursor = req_ser.validated_data.get('cursor', None)
+    cursor_key = req_ser.validated_data.get('cursor_key', 'id')
+    use_cursor = cursor or req_ser.validated_data.get('pagination') == 'cursor'
+    approximate = req_ser.validated_data.get('count') == 'approximate'
+
+    filters = Q(deleted_at=None)
     if search:
-        attribute_groups = AttributeGroup.objects.filter(name__icontains=search)
+        filters &= Q(name__icontains=search)
+
+    queryset = AttributeGroup.objects.filter(filters)
+    if fields:
+        # Skip loading the values JSON when the client did not ask for it
+        queryset = queryset.only(*fields, 'updated_at')
+
+    if use_cursor:
+        try:
+            attribute_groups, pagination = paginate_by_cursor(queryset, limit, cursor=cursor, key=cursor_key)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e),
+                'code': 400
+            }, status=400)
     else:
-        attribute_groups = AttributeGroup.objects.all()
+        attribute_groups, pagination = paginate_by_page(queryset.order_by('id'), page, limit, approximate=approximate)
 
-    serializer = AttributeGroupSerializer(attribute_groups, many=True)
+    serializer = AttributeGroupSerializer(attribute_groups, many=True, fields=fields)
     return Response({
         'status': 'success',
         'data': serializer.data,
+        'meta': {
+            'pagination': pagination
+        }
     }, status=200)
 
 
@@ -45,9 +84,14 @@ def create_attribute_group(request):
 @permission_classes([IsAuth])
 def update_attribute_group(request, ag_id):
     attribute_group = AttributeGroup.objects.get(id=ag_id)
+    previous_name = attribute_group.name
     serializer = AttributeGroupSerializer(attribute_group, data=request.data)
     if serializer.is_valid():
         serializer.save()
+        if attribute_group.name != previous_name:
+            # Details keys are matched to attribute groups by name
+            family_ids = ProductFamilyAttribute.objects.filter(attribute=attribute_group).values_list('family_id', flat=True)
+            queue_attribute_rebuild(family_ids)
         return Response({
             'status': 'success',
             'data': serializer.data,
@@ -64,7 +108,12 @@ def update_attribute_group(request, ag_id):
 @permission_classes([IsAuth])
 def delete_attribute_group(request, ag_id):
     attribute_group = AttributeGroup.objects.get(id=ag_id)
-    attribute_group.delete()
+    links = ProductFamilyAttribute.objects.filter(attribute=attribute_group)
+    family_ids = list(links.values_list('family_id', flat=True))
+    attribute_group.deleted_at = timezone.now()
+    attribute_group.save(update_fields=['deleted_at', 'updated_at'])
+    links.soft_delete()
+    queue_attribute_rebuild(family_ids)  # Drops the group's values from the index
     return Response({
         'status': 'success',
         'message': 'Attribute group deleted successfully',
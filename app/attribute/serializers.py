@@ -1,8 +1,17 @@
 from rest_framework import serializers
 from app.models import AttributeGroup
+from app.serializers import BasePaginationSerializer, DynamicFieldsModelSerializer, parse_fields
 
 
-class AttributeGroupSerializer(serializers.ModelSerializer):
+class AttributeGroupSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = AttributeGroup
-        fields = ['id', 'name', 'values']
\ No newline at end of file
+        fields = ['id', 'name', 'values']
+
+
+class PaginationSerializer(BasePaginationSerializer):
+    search = serializers.CharField(required=False)
+    fields = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        return parse_fields(value, AttributeGroupSerializer.Meta.fields)
@@ -0,0 +1,78 @@
+import random
+import time
+from app.models import Product, ProductFamily
+
+
+BENCH_SKU_PREFIX = 'BENCH-'
+BENCH_FAMILY_PREFIX = 'BENCH family '
+WORDS = [
+    'cotton', 'linen', 'denim', 'leather', 'wool', 'silk', 'shirt', 'trouser', 'jacket', 'sneaker',
+    'boot', 'scarf', 'watch', 'wallet', 'backpack', 'classic', 'slim', 'oversized', 'vintage', 'summer',
+    'winter', 'black', 'white', 'navy', 'olive', 'crimson', 'charcoal', 'ivory', 'striped', 'printed',
+]
+
+
+def seed_families(count):
+    existing = list(ProductFamily.objects.filter(name__startswith=BENCH_FAMILY_PREFIX).values_list('id', flat=True))
+    for n in range(len(existing), count):
+        existing.append(ProductFamily.objects.create(name=f'{BENCH_FAMILY_PREFIX}{n}').id)
+    return existing[:count]
+
+
+def seed_products(count, batch_size=5000, start=0, family_ids=None):
+    """
+        Inserts synthetic products with SKUs BENCH-<n> for n in [start, start + count).
+    """
+    rng = random.Random(start)
+    created = 0
+    while created < count:
+        batch = []
+        for n in range(start + created, start + min(created + batch_size, count)):
+            words = rng.sample(WORDS, 4)
+            product = Product(
+                sku=f'{BENCH_SKU_PREFIX}{n:08d}',
+                name=' '.join(words[:3]).title(),
+                description=f'{" ".join(words)} {rng.choice(WORDS)} edition',
+                price=round(rng.uniform(5, 500), 2),
+                family_id=rng.choice(family_ids) if family_ids else None,
+                details={'color': rng.choice(WORDS[21:29]), 'material': rng.choice(WORDS[:6])},
+                images=[],
+                is_archived=rng.random() < 0.3,
+                is_published=rng.random() < 0.6,
+            )
+            product.refresh_derived_fields()
+            batch.append(product)
+        Product.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def delete_seeded_products(batch_size=5000):
+    deleted = 0
+    while True:
+        ids = list(Product.all_objects.filter(sku__startswith=BENCH_SKU_PREFIX).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            ProductFamily.all_objects.filter(name__startswith=BENCH_FAMILY_PREFIX).delete()
+            return deleted
+        deleted += Product.all_objects.filter(id__in=ids).delete()[0]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_query(func, inputs):
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        func(value)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        'p50': percentile(samples, 50),
+        'p99': percentile(samples, 99),
+        'max': max(samples) if samples else 0
+    }
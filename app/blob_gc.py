@@ -0,0 +1,89 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from app.models import BlobDeletion, Product, User
+from app.storage import BATCH_DELETE_LIMIT, get_storage
+from app.pagination import iterate_by_keyset
+from app.helpers import get_referenced_blob_name, get_variant_urls, get_referenced_blobs, release_files
+
+
+def claim_deletions(limit):
+    # Pushing not_before forward acts as a lease: other workers skip these rows until it expires,
+    # so a worker that dies mid-batch only delays its deletions
+    now = timezone.now()
+    with transaction.atomic():
+        deletions = list(BlobDeletion.objects.select_for_update(skip_locked=True)
+                         .filter(not_before__lte=now).order_by('not_before', 'id')[:limit])
+        BlobDeletion.objects.filter(id__in=[deletion.id for deletion in deletions]).update(
+            not_before=now + timedelta(seconds=settings.BLOB_GC_LEASE)
+        )
+    return deletions
+
+
+def process_deletions(limit=BATCH_DELETE_LIMIT):
+    """
+        Deletes the next batch of queued blobs with one batch request and returns
+        (deleted, skipped, failed). Blobs that got referenced again since they were queued are kept.
+    """
+    claimed = claim_deletions(limit)
+    if not claimed:
+        return 0, 0, 0
+
+    # The rows stay locked until the blobs are gone: an upload reusing one of them cancels its
+    # deletion first, so it either removes the row before this lock or waits and stores it again
+    with transaction.atomic():
+        deletions = list(BlobDeletion.objects.select_for_update().filter(id__in=[d.id for d in claimed]))
+        referenced = get_referenced_blobs(deletion.blob_name for deletion in deletions)
+        blob_names = list({deletion.blob_name for deletion in deletions} - referenced)
+        failed = set(get_storage().delete_many(blob_names)) if blob_names else set()
+
+        retries = [deletion for deletion in deletions if deletion.blob_name in failed]
+        for deletion in retries:
+            deletion.attempts += 1
+            deletion.last_error = 'Batch delete failed'
+            deletion.not_before = timezone.now() + timedelta(seconds=min(60 * 2 ** deletion.attempts, 3600))
+        given_up = [deletion for deletion in retries if deletion.attempts >= settings.BLOB_GC_MAX_ATTEMPTS]
+        for deletion in given_up:
+            print(f"Giving up deleting blob {deletion.blob_name} after {deletion.attempts} attempts")
+
+        BlobDeletion.objects.bulk_update([d for d in retries if d not in given_up],
+                                         ['attempts', 'last_error', 'not_before'])
+        BlobDeletion.objects.filter(id__in=[d.id for d in deletions if d not in retries or d in given_up]).delete()
+    return len(blob_names) - len(failed), len(referenced), len(failed)
+
+
+def get_referenced_blob_names():
+    names = set()
+    products = Product.all_objects.only('id', 'images', 'image_variants')
+    for product in iterate_by_keyset(products):
+        for file_url in (product.images or []) + get_variant_urls(product.image_variants):
+            names.add(get_referenced_blob_name(file_url))
+    pictures = User.all_objects.exclude(profile_picture=None).values_list('profile_picture', flat=True)
+    for file_url in pictures.iterator():
+        names.add(get_referenced_blob_name(file_url))
+    return names
+
+
+def sweep_orphaned_blobs(grace=None):
+    """
+        Queues every blob under lzaz-pim/ that no product or user references and that is older than
+        the grace period, so uploads that are not saved on a row yet are left alone. Returns the
+        number queued.
+    """
+    grace = settings.BLOB_GC_SWEEP_GRACE if grace is None else grace
+    modified_before = timezone.now() - timedelta(seconds=grace)
+    referenced = get_referenced_blob_names()
+
+    storage = get_storage()
+    orphaned = []
+    queued = 0
+    for blob_name, last_modified in storage.list_blobs('lzaz-pim/'):
+        if last_modified < modified_before and blob_name not in referenced:
+            orphaned.append(storage.get_url(blob_name))
+        if len(orphaned) >= BATCH_DELETE_LIMIT:
+            release_files(orphaned)
+            queued += len(orphaned)
+            orphaned = []
+    release_files(orphaned)
+    return queued + len(orphaned)
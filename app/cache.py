@@ -0,0 +1,118 @@
+import time
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from rest_framework.response import Response
+
+CACHED_VIEWS = []
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    """
+        Returns the current version of a cache namespace. Versions start from a timestamp so a
+        version lost on eviction never collides with one handed out before.
+    """
+    return get_versions(name)[0]
+
+
+def get_versions(*names):
+    keys = [_version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*names):
+    for name in names:
+        key = _version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_watermark(model):
+    """
+        Latest updated_at over all rows of the model, soft-deleted ones included, together with its
+        cache version. Writes from any process move it, so keys built on it never outlive them.
+    """
+    updated_at = model.all_objects.aggregate(updated_at=Max('updated_at'))['updated_at']
+    return updated_at, get_version(model._meta.model_name)
+
+
+def record_cache_event(view_name, event):
+    key = f'stats:response:{view_name}:{event}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats():
+    keys = {(name, event): f'stats:response:{name}:{event}' for name in CACHED_VIEWS for event in ('hit', 'miss')}
+    values = cache.get_many(list(keys.values()))
+    return {
+        name: {event: values.get(keys[(name, event)], 0) for event in ('hit', 'miss')}
+        for name in CACHED_VIEWS
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([f'stats:response:{name}:{event}' for name in CACHED_VIEWS for event in ('hit', 'miss')])
+
+
+def get_query_params(request):
+    # Parameter order does not change the result, so it must not change cache keys or ETags either
+    return sorted((key, request.GET.getlist(key)) for key in request.GET)
+
+
+def cache_response(*namespaces, timeout=None, key_func=None):
+    """
+        Caches successful responses of a function view per path and query string. Namespaces may use
+        the view's URL kwargs, e.g. 'product:{pd_id}'; bumping any of their versions invalidates the
+        entry. key_func(request, **kwargs) adds state read from the database to the key, for entries
+        that must not outlive writes made by other processes. Apply below @permission_classes so
+        cached responses are still access-checked.
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__name__}'
+        CACHED_VIEWS.append(view_name)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return view(request, *args, **kwargs)
+
+            params = get_query_params(request)
+            versions = get_versions(*(namespace.format(**kwargs) for namespace in namespaces))
+            state = key_func(request, *args, **kwargs) if key_func else None
+            digest = hashlib.md5(repr((request.path, params, versions, state)).encode()).hexdigest()
+            key = f'response:{view_name}:{digest}'
+
+            cached = cache.get(key)
+            if cached is not None:
+                record_cache_event(view_name, 'hit')
+                data, status_code = cached
+                response = Response(data, status=status_code)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            record_cache_event(view_name, 'miss')
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.data, response.status_code),
+                          timeout=settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
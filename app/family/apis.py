@@ -3,28 +3,77 @@ from rest_framework.permissions import AllowAny
 from app.permissions import IsAuth, IsAdmin
 from rest_framework.response import Response
 from rest_framework import status
-from app.models import ProductFamily, ProductFamilyAttribute, AttributeGroup
-from .serializers import ProductFamilySerializer, AddProductFamilySerializer, AttributeGroupSerializer
+from django.db.models import Q
+from django.utils import timezone
+from app.models import Product, ProductFamily, ProductFamilyAttribute, AttributeGroup
+from .serializers import (ProductFamilySerializer, AddProductFamilySerializer, AttributeGroupSerializer,
+                          PaginationSerializer, prefetch_attribute_groups)
+from app.pagination import paginate_by_cursor, paginate_by_page
+from app.cache import cache_response
+from app.product.attributes import queue_attribute_rebuild
+
+FAMILY_NAMESPACES = ('productfamily', 'attributegroup', 'productfamilyattribute')
 
 
 @api_view(['GET'])
 @permission_classes([IsAuth])
+@cache_response(*FAMILY_NAMESPACES)
 def get_product_families(request):
-    search = request.GET.get('search')
+    req_ser = PaginationSerializer(data=request.GET)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': 400
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    search = req_ser.validated_data.get('search', None)
+    fields = req_ser.validated_data.get('fields', None)
+    attribute_fields = req_ser.validated_data.get('attribute_fields', None)
+    page = req_ser.validated_data.get('page', 1)
+    limit = req_ser.validated_data.get('limit', 10)
+    cursor = req_ser.validated_data.get('cursor', None)
+    cursor_key = req_ser.validated_data.get('cursor_key', 'id')
+    use_cursor = cursor or req_ser.validated_data.get('pagination') == 'cursor'
+    approximate = req_ser.validated_data.get('count') == 'approximate'
+
+    filters = Q(deleted_at=None)
     if search:
-        families = ProductFamily.objects.filter(name__icontains=search)
+        filters &= Q(name__icontains=search)
+
+    queryset = ProductFamily.objects.filter(filters)
+    if fields is None or 'attribute_groups' in fields:
+        families = prefetch_attribute_groups(queryset, attribute_fields=attribute_fields)
     else:
-        families = ProductFamily.objects.all()
+        families = queryset
+
+    if use_cursor:
+        try:
+            families, pagination = paginate_by_cursor(families, limit, cursor=cursor, key=cursor_key)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e),
+                'code': 400
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        families, pagination = paginate_by_page(queryset, page, limit, approximate=approximate,
+                                                ordered_queryset=families.order_by('id'))
 
-    serializer = ProductFamilySerializer(families, many=True)
+    serializer = ProductFamilySerializer(families, many=True, fields=fields,
+                                         context={'attribute_fields': attribute_fields})
     return Response({
         'status': 'success',
-        'data': serializer.data
+        'data': serializer.data,
+        'meta': {
+            'pagination': pagination
+        }
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuth])
+@cache_response(*FAMILY_NAMESPACES)
 def get_family_attributes(request, pf_id):
     family = ProductFamily.objects.get(id=pf_id)
     if not family:
@@ -34,8 +83,7 @@ def get_family_attributes(request, pf_id):
             'code': 400
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    family_attributes = ProductFamilyAttribute.objects.filter(family=family).values_list('attribute', flat=True)
-    attribute_groups = AttributeGroup.objects.filter(id__in=family_attributes, deleted_at=None)
+    attribute_groups = family.attribute_groups.filter(deleted_at=None)
     serializer = AttributeGroupSerializer(attribute_groups, many=True)
     return Response({
         'status': 'success',
@@ -121,6 +169,7 @@ def update_product_family(request, pf_id):
             ProductFamilyAttribute.objects.filter(family=family).delete()
             for attribute in valid_attributes:
                 family_attr, created = ProductFamilyAttribute.objects.get_or_create(family=family, attribute=attribute)
+            queue_attribute_rebuild([family.id])
 
     serializer = ProductFamilySerializer(family)
     return Response({
@@ -141,7 +190,11 @@ def delete_product_family(request, pf_id):
             'code': 404
         }, status=status.HTTP_404_NOT_FOUND)
 
-    family.delete()
+    # Deleting a family used to cascade to its products; the soft delete keeps that, in short batches
+    family.deleted_at = timezone.now()
+    family.save(update_fields=['deleted_at', 'updated_at'])
+    ProductFamilyAttribute.objects.filter(family=family).soft_delete()
+    Product.objects.filter(family=family).soft_delete()
     return Response({
         'status': 'success',
         'message': 'Product family deleted successfully'
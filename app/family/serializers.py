@@ -1,14 +1,28 @@
 from rest_framework import serializers
-from app.models import ProductFamily, AttributeGroup, ProductFamilyAttribute
+from django.db.models import Prefetch
+from app.models import ProductFamily, AttributeGroup
+from app.serializers import BasePaginationSerializer, DynamicFieldsModelSerializer, parse_fields
 
 
-class AttributeGroupSerializer(serializers.ModelSerializer):
+def prefetch_attribute_groups(queryset, attribute_fields=None):
+    # Loads the attribute groups of every family in one extra query instead of two per family
+    attribute_groups = AttributeGroup.objects.filter(deleted_at=None)
+    if attribute_fields:
+        attribute_groups = attribute_groups.only(*attribute_fields)
+    return queryset.prefetch_related(Prefetch(
+        'attribute_groups',
+        queryset=attribute_groups,
+        to_attr='active_attribute_groups'
+    ))
+
+
+class AttributeGroupSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = AttributeGroup
         fields = ['id', 'name', 'values']
 
 
-class ProductFamilySerializer(serializers.ModelSerializer):
+class ProductFamilySerializer(DynamicFieldsModelSerializer):
     attribute_groups = serializers.SerializerMethodField()
 
     class Meta:
@@ -16,12 +30,26 @@ class ProductFamilySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'attribute_groups']
 
     def get_attribute_groups(self, obj):
-        family_attributes = ProductFamilyAttribute.objects.filter(family=obj).values_list('attribute', flat=True)
-        attribute_groups = AttributeGroup.objects.filter(id__in=family_attributes, deleted_at=None)
-        serializer = AttributeGroupSerializer(attribute_groups, many=True)
+        attribute_groups = getattr(obj, 'active_attribute_groups', None)
+        if attribute_groups is None:
+            attribute_groups = obj.attribute_groups.filter(deleted_at=None)
+        serializer = AttributeGroupSerializer(attribute_groups, many=True,
+                                              fields=self.context.get('attribute_fields'))
         return serializer.data
 
 
 class AddProductFamilySerializer(serializers.Serializer):
     name = serializers.CharField(required=False)
     attribute_groups = serializers.ListField(required=False)
+
+
+class PaginationSerializer(BasePaginationSerializer):
+    search = serializers.CharField(required=False)
+    fields = serializers.CharField(required=False)
+    attribute_fields = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        return parse_fields(value, ProductFamilySerializer.Meta.fields)
+
+    def validate_attribute_fields(self, value):
+        return parse_fields(value, AttributeGroupSerializer.Meta.fields)
@@ -1,45 +1,225 @@
 import os
-from azure.storage.blob import BlobServiceClient
+import time
+import hashlib
+import uuid
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote, urlsplit
 import random
 import string
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from app.storage import get_storage
 
 
-# Load Azure Blob Storage credentials from environment variables
-AZURE_STORAGE_ACCOUNT_NAME = os.getenv('AZURE_STORAGE_ACCOUNT_NAME')
-AZURE_STORAGE_KEY = os.getenv('AZURE_STORAGE_KEY')
-AZURE_BLOB_CONTAINER_NAME = os.getenv('AZURE_BLOB_CONTAINER_NAME')
-
-
-# Construct the Blob Service Client
-connection_string = f"DefaultEndpointsProtocol=https;AccountName={AZURE_STORAGE_ACCOUNT_NAME};AccountKey={AZURE_STORAGE_KEY};EndpointSuffix=core.windows.net"
-blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+def get_content_hash(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
 
 
 def save_file_to_blob(file):
     try:
         file_name = file.name
-        blob_client = blob_service_client.get_blob_client(container=AZURE_BLOB_CONTAINER_NAME, blob=f"lzaz-pim/{file_name}")
-        blob_client.upload_blob(file, overwrite=True)
-        file_url = f"https://{AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{AZURE_BLOB_CONTAINER_NAME}/lzaz-pim/{file_name}"
-        print(f"File {file_name} uploaded successfully to Azure Blob Storage")
+        # Blobs are named by content hash: identical uploads share one blob and different files
+        # with the same name no longer overwrite each other
+        content_hash = get_content_hash(file)
+        extension = os.path.splitext(file_name)[1].lower()
+        blob_name = f"lzaz-pim/{content_hash[:2]}/{content_hash}{extension}"
+        storage = get_storage()
+        keep_blob(blob_name)
+        if storage.exists(blob_name):
+            print(f"File {file_name} already stored as {blob_name}")
+            return storage.get_url(blob_name)
+
+        # Files above FILE_UPLOAD_MAX_MEMORY_SIZE are already spooled to a temporary file by Django;
+        # the backend reads that stream block by block instead of buffering it
+        started = time.perf_counter()
+        file_url = storage.save(blob_name, file, length=file.size, content_type=getattr(file, 'content_type', None))
+        elapsed = time.perf_counter() - started
+        throughput = file.size / 1024 / 1024 / elapsed if elapsed > 0 else 0
+        print(f"File {file_name} uploaded successfully to blob storage "
+              f"({file.size} bytes in {elapsed:.2f}s, {throughput:.2f} MB/s)")
         print()
         return file_url
     except Exception as e:
-        print("Error uploading file to Azure Blob Storage:", str(e))
+        print("Error uploading file to blob storage:", str(e))
         return None
 
 
-def delete_file_from_blob(file_url):
+def keep_blob(blob_name):
+    """
+        Cancels queued deletions of a blob that is about to be reused. The blob worker holds the
+        rows of the batch it is deleting, so this waits for that batch to finish; checking whether
+        the blob exists afterwards tells whether it has to be stored again.
+    """
+    from app.models import BlobDeletion
+
+    BlobDeletion.objects.filter(blob_name=blob_name).delete()
+
+
+def save_bytes_to_blob(blob_name, data, content_type):
+    keep_blob(blob_name)
+    return get_storage().save(blob_name, data, length=len(data), content_type=content_type)
+
+
+def read_file_from_blob(file_url):
+    storage = get_storage()
+    return storage.read(storage.get_blob_name(file_url))
+
+
+def get_blob_name(file_url):
+    """
+        Returns the blob path inside our container for a URL we issued, or None for foreign URLs.
+    """
+    return get_storage().get_blob_name(file_url)
+
+
+def get_referenced_blob_name(file_url):
+    """
+        Blob name a stored URL refers to. Besides the URLs we issue, it accepts other forms of the
+        same blob (another host, a query string) so that no form of a reference gets its blob deleted.
+    """
+    blob_name = get_blob_name(file_url)
+    if blob_name:
+        return blob_name
+    path = unquote(urlsplit(file_url).path)
+    start = path.find('lzaz-pim/')
+    return path[start:] if start >= 0 else None
+
+
+def get_canonical_url(file_url):
+    """
+        The plain blob URL for a URL we issued, dropping any query string such as a write SAS.
+    """
+    return get_storage().get_url(get_blob_name(file_url))
+
+
+def generate_upload_url(file_name):
+    """
+        Issues a short-lived SAS URL that lets a client PUT one new blob straight into the container.
+    """
+    file_name = os.path.basename(file_name.replace('\\', '/')) or 'file'
+    blob_name = f"lzaz-pim/uploads/{uuid.uuid4().hex}/{file_name}"
+    expires_at = timezone.now() + timedelta(seconds=settings.BLOB_UPLOAD_SAS_EXPIRY)
+    storage = get_storage()
+    return {
+        'file_name': file_name,
+        'upload_url': storage.get_upload_url(blob_name, expires_at),
+        'file_url': storage.get_url(blob_name),
+        'expires_at': expires_at
+    }
+
+
+def is_uploaded_blob(file_url):
+    """
+        True when the URL points at a blob issued by generate_upload_url that the client has uploaded.
+    """
+    blob_name = get_blob_name(file_url)
+    if not blob_name or not blob_name.startswith('lzaz-pim/uploads/'):
+        return False
     try:
-        # Extract the file name from the URL
-        file_name = file_url.split('/')[-1]
-        blob_client = blob_service_client.get_blob_client(container=AZURE_BLOB_CONTAINER_NAME, blob=f"lzaz-pim/{file_name}")
-        blob_client.delete_blob()
-        print(f"File {file_name} successfully deleted from Azure Blob Storage")
+        return get_storage().exists(blob_name)
     except Exception as e:
-        print(f"Error deleting file from Azure Blob Storage: {e}")
+        print(f"Error checking blob {blob_name}: {e}")
+        return False
+
+
+def get_referenced_blobs(blob_names):
+    """
+        Returns the subset of blob_names that a user or product, deleted or not, still points at,
+        whatever form of URL the row stores. One query per table covers the whole batch.
+    """
+    from app.models import Product, User
+
+    blob_names = set(blob_names)
+    if not blob_names:
+        return set()
+
+    # The substring match on the file name only narrows the rows; the exact check on blob names happens here
+    pictures = Q()
+    products = Q()
+    for blob_name in blob_names:
+        file_name = blob_name.rsplit('/', 1)[-1]
+        for token in {file_name, quote(file_name)}:
+            pictures |= Q(profile_picture__contains=token)
+            products |= Q(images__icontains=token) | Q(image_variants__icontains=token)
+
+    file_urls = list(User.all_objects.filter(pictures).values_list('profile_picture', flat=True))
+    for images, variants in Product.all_objects.filter(products).values_list('images', 'image_variants').iterator():
+        file_urls += (images or []) + get_variant_urls(variants)
+    return blob_names.intersection(get_referenced_blob_name(file_url) for file_url in file_urls)
+
+
+def release_files(file_urls):
+    """
+        Queues blobs for deletion by the blob worker, which deletes them in batches once nothing
+        references them any more; content-addressed blobs can be shared.
+    """
+    from app.models import BlobDeletion
+
+    not_before = timezone.now() + timedelta(seconds=settings.BLOB_GC_DELAY)
+    deletions = []
+    for file_url in set(filter(None, file_urls)):
+        blob_name = get_blob_name(file_url)
+        if blob_name:  # Foreign URLs are not ours to delete
+            deletions.append(BlobDeletion(file_url=file_url, blob_name=blob_name, not_before=not_before))
+    BlobDeletion.objects.bulk_create(deletions)
+
+
+def release_file(file_url):
+    release_files([file_url])
+
+
+def get_variant_urls(image_variants):
+    return [url for variants in (image_variants or {}).values() for url in variants.values()]
+
+
+def save_file_to_blob_in_thread(file):
+    try:
+        return save_file_to_blob(file)
+    finally:
+        connections.close_all()  # Pool threads are not request-managed, so their connections are closed here
+
+
+def save_files_to_blob(files):
+    """
+        Uploads files concurrently and returns their URLs in the same order. If any upload fails,
+        the ones that succeeded are deleted again and None is returned.
+    """
+    if not files:
+        return []
+
+    max_workers = min(settings.BLOB_UPLOAD_MAX_WORKERS, len(files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        file_urls = list(executor.map(save_file_to_blob_in_thread, files))
+
+    if None in file_urls:
+        release_files(file_urls)
+        return None
+    return file_urls
+
+
+def merge_patch(target, patch):
+    """
+        Applies an RFC 7386 JSON merge patch: objects merge recursively, null removes a key and any
+        other value replaces the target.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
 
 
 def generate_random_string(length=30):
@@ -0,0 +1,93 @@
+import io
+import hashlib
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from app.models import Product
+from app.cache import bump_version
+from app.helpers import get_blob_name, read_file_from_blob, save_bytes_to_blob
+
+
+def get_variant_sizes():
+    return {
+        'thumbnail': settings.IMAGE_THUMBNAIL_SIZE,
+        'large': settings.IMAGE_LARGE_SIZE,
+    }
+
+
+def render_variants(data):
+    """
+        Returns {variant name: WebP bytes}, each variant scaled down to fit its size box.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        variants = {}
+        for name, size in get_variant_sizes().items():
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)  # Never upscales
+            output = io.BytesIO()
+            variant.save(output, 'WEBP', quality=settings.IMAGE_WEBP_QUALITY, method=4)
+            variants[name] = output.getvalue()
+        return variants
+
+
+def generate_variants(file_url):
+    """
+        Builds the derivatives of one original image. Variant blobs are named after the hash of the
+        original, so identical images share their variants and re-runs overwrite nothing.
+    """
+    if not get_blob_name(file_url):
+        return {}  # Not stored by us; clients keep using the original URL
+
+    data = read_file_from_blob(file_url)
+    content_hash = hashlib.sha256(data).hexdigest()
+    try:
+        rendered = render_variants(data)
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"Skipping variants for {file_url}: {e}")
+        return {}
+
+    return {
+        name: save_bytes_to_blob(f"lzaz-pim/variants/{content_hash}/{name}.webp", variant, 'image/webp')
+        for name, variant in rendered.items()
+    }
+
+
+def process_product(product):
+    """
+        Fills in missing variants for one product. The result is only written if the product has not
+        changed since it was read; otherwise it stays pending and is picked up again.
+    """
+    images = product.images or []
+    variants = {url: value for url, value in (product.image_variants or {}).items() if url in images}
+    for file_url in images:
+        if file_url not in variants:
+            variants[file_url] = generate_variants(file_url)
+
+    updated = Product.objects.filter(id=product.id, updated_at=product.updated_at).update(
+        image_variants=variants, variants_pending=False, updated_at=timezone.now()
+    )
+    if updated:
+        bump_version('product', f'product:{product.id}')  # update() does not send post_save
+    return bool(updated)
+
+
+def process_pending_products(after_id=0, limit=None):
+    """
+        Processes the next batch of products with pending variants in id order and returns the last
+        id seen, or None when there was nothing left after after_id.
+    """
+    products = list(Product.objects.filter(variants_pending=True, deleted_at=None, id__gt=after_id)
+                    .only('id', 'images', 'image_variants', 'updated_at')
+                    .order_by('id')[:limit or settings.IMAGE_WORKER_BATCH_SIZE])
+    for product in products:
+        try:
+            if process_product(product):
+                print(f"Generated image variants for product {product.id}")
+        except Exception as e:
+            # Left pending; the next pass retries it
+            print(f"Error generating image variants for product {product.id}: {e}")
+    return products[-1].id if products else None
@@ -0,0 +1,62 @@
+import random
+from django.core.management.base import BaseCommand
+from app.models import Product
+from app.benchmarks import BENCH_SKU_PREFIX, seed_families, seed_products, delete_seeded_products, time_query
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a synthetic catalog and reports the EXPLAIN plan and latency of each product listing filter. '
+        'To compare before/after an index change, run it with --keep on the old schema, migrate, and run it again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000000)
+        parser.add_argument('--families', type=int, default=50)
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded catalog for the next run')
+
+    def listing_cases(self, family_id):
+        live = Product.objects.filter(deleted_at=None)
+        return [
+            ('all', live),
+            ('published', live.filter(is_published=True)),
+            ('archived', live.filter(is_archived=True, is_published=False)),
+            ('family', live.filter(family_id=family_id)),
+        ]
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        family_ids = seed_families(options['families'])
+        seeded = Product.objects.filter(sku__startswith=BENCH_SKU_PREFIX).count()
+        if seeded < options['products']:
+            self.stdout.write(f'Seeding {options["products"] - seeded} products...')
+            seed_products(options['products'] - seeded, start=seeded, family_ids=family_ids)
+
+        rng = random.Random(7)
+        try:
+            for label, queryset in self.listing_cases(rng.choice(family_ids)):
+                ordered = queryset.order_by('id')
+                total = queryset.count()
+                deep_offset = max(total - limit, 0) // 2
+                by_updated = queryset.order_by('updated_at', 'id')
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n[{label}] {total} rows'))
+                self.stdout.write(f'EXPLAIN first page:\n{ordered[:limit].explain()}')
+                self.stdout.write(f'EXPLAIN filter:\n{queryset.explain()}')
+
+                cases = [
+                    ('first page', lambda _: list(ordered[:limit])),
+                    (f'offset {deep_offset}', lambda _: list(ordered[deep_offset:deep_offset + limit])),
+                    ('updated_at page', lambda _: list(by_updated[:limit])),
+                    ('count', lambda _: queryset.count()),
+                ]
+                for name, func in cases:
+                    result = time_query(func, range(options['runs']))
+                    self.stdout.write(
+                        f'  {name:<20} p50={result["p50"]:.2f}ms  p99={result["p99"]:.2f}ms  max={result["max"]:.2f}ms'
+                    )
+        finally:
+            if not options['keep']:
+                self.stdout.write(f'Removed {delete_seeded_products()} seeded products')
@@ -0,0 +1,45 @@
+import random
+from django.core.management.base import BaseCommand
+from app.models import Product
+from app.benchmarks import WORDS, BENCH_SKU_PREFIX, seed_products, delete_seeded_products, time_query
+from app.search import search_products, rank_products
+
+
+class Command(BaseCommand):
+    help = 'Compares product search latency of the LIKE scan against the FULLTEXT index on a synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100000, 1000000])
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded products afterwards')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        limit = options['limit']
+        terms = [rng.choice(WORDS) for _ in range(options['queries'])]
+        terms += [f'{BENCH_SKU_PREFIX}{rng.randrange(min(options["sizes"])):08d}'[:-3] for _ in range(options['queries'] // 4)]
+        base = Product.objects.filter(deleted_at=None)
+
+        def like_scan(term):
+            list(base.filter(name__icontains=term)[:limit])
+
+        def fulltext(term):
+            list(rank_products(search_products(base, term), term)[:limit])
+
+        seeded = Product.objects.filter(sku__startswith=BENCH_SKU_PREFIX).count()
+        try:
+            for size in sorted(options['sizes']):
+                if seeded < size:
+                    self.stdout.write(f'Seeding {size - seeded} products...')
+                    seeded += seed_products(size - seeded, start=seeded)
+
+                for label, func in (('LIKE', like_scan), ('FULLTEXT', fulltext)):
+                    result = time_query(func, terms)
+                    self.stdout.write(
+                        f'{size:>9} products  {label:<8}  p50={result["p50"]:.2f}ms  '
+                        f'p99={result["p99"]:.2f}ms  max={result["max"]:.2f}ms'
+                    )
+        finally:
+            if not options['keep']:
+                self.stdout.write(f'Removed {delete_seeded_products()} seeded products')
@@ -0,0 +1,54 @@
+import sys
+import time
+import subprocess
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.benchmarks import percentile
+
+WATCHED_MODULES = ['azure.storage.blob', 'app.helpers', 'app.storage']
+
+
+def parse_import_times(output):
+    """
+        Returns {module: cumulative import time in ms} from `python -X importtime` output.
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, module = line.split('|')
+        cumulative = cumulative.strip()
+        if cumulative.isdigit():
+            times[module.strip()] = int(cumulative) / 1000
+    return times
+
+
+class Command(BaseCommand):
+    help = 'Measures the startup time of manage.py commands and which heavy modules they import'
+
+    def add_arguments(self, parser):
+        parser.add_argument('commands', nargs='*', default=['check', 'showmigrations'])
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        manage_py = str(settings.BASE_DIR / 'manage.py')
+        for command in options['commands']:
+            samples = []
+            import_times = {}
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                process = subprocess.run([sys.executable, '-X', 'importtime', manage_py, *command.split()],
+                                         capture_output=True, text=True)
+                samples.append((time.perf_counter() - started) * 1000)
+                if process.returncode != 0:
+                    self.stderr.write(f'{command} failed:\n{process.stderr[-2000:]}')
+                    return
+                import_times = parse_import_times(process.stderr)
+
+            self.stdout.write(f'manage.py {command}: p50={percentile(samples, 50):.0f}ms  '
+                              f'min={min(samples):.0f}ms  runs={len(samples)}')
+            for module in WATCHED_MODULES:
+                if module in import_times:
+                    self.stdout.write(f'    {module:<20} imported, {import_times[module]:.1f}ms cumulative')
+                else:
+                    self.stdout.write(f'    {module:<20} not imported')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+from app.cache import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows response cache hits and misses per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        get_resolver().url_patterns  # Imports the views so their cached endpoints are registered
+        for view_name, counts in get_cache_stats().items():
+            total = counts['hit'] + counts['miss']
+            ratio = counts['hit'] / total * 100 if total else 0
+            self.stdout.write(f'{view_name:<50} hits={counts["hit"]:<8} misses={counts["miss"]:<8} '
+                              f'hit ratio={ratio:.1f}%')
+        if options['reset']:
+            reset_cache_stats()
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = 'Hard-deletes soft-deleted rows past the retention period in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.SOFT_DELETE_RETENTION_DAYS)
+        parser.add_argument('--batch-size', type=int, default=settings.PURGE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be purged')
+
+    def handle(self, *args, **options):
+        purged = purge_deleted(retention_days=options['retention_days'], batch_size=options['batch_size'],
+                               pause=options['pause'], dry_run=options['dry_run'])
+        verb = 'Would purge' if options['dry_run'] else 'Purged'
+        for label, count in purged.items():
+            self.stdout.write(f'{verb} {count} {label} rows')
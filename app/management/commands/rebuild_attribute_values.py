@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.product.attributes import rebuild_attribute_values
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the indexed attribute values of every product from its details'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_attribute_values(batch_size=options['batch_size'])
+        self.stdout.write(f'Rebuilt attribute values for {rebuilt} products')
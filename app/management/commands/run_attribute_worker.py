@@ -0,0 +1,23 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.product.attributes import process_attribute_rebuilds
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the indexed attribute values of queued product families'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=settings.ATTRIBUTE_WORKER_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            rebuilt = process_attribute_rebuilds()
+            if rebuilt:
+                self.stdout.write(f'Rebuilt attribute values for {rebuilt} product families')
+                continue
+
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,30 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.blob_gc import process_deletions, sweep_orphaned_blobs
+
+
+class Command(BaseCommand):
+    help = 'Deletes queued blobs in batches and optionally sweeps the container for orphaned blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=settings.BLOB_GC_POLL_INTERVAL)
+        parser.add_argument('--sweep', action='store_true', help='Queue unreferenced blobs before processing')
+        parser.add_argument('--grace', type=int, default=settings.BLOB_GC_SWEEP_GRACE,
+                            help='Seconds a blob must be unmodified before the sweep may queue it')
+
+    def handle(self, *args, **options):
+        if options['sweep']:
+            queued = sweep_orphaned_blobs(grace=options['grace'])
+            self.stdout.write(f'Sweep queued {queued} orphaned blobs')
+
+        while True:
+            deleted, skipped, failed = process_deletions()
+            if deleted or skipped or failed:
+                self.stdout.write(f'Deleted {deleted} blobs, kept {skipped} still referenced, {failed} failed')
+                continue
+
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,26 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.images import process_pending_products
+
+
+class Command(BaseCommand):
+    help = 'Generates thumbnail and WebP variants for product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit after one pass over pending products')
+        parser.add_argument('--poll-interval', type=float, default=settings.IMAGE_WORKER_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        # Walks pending products in id order so a product that keeps failing cannot starve the rest
+        last_id = 0
+        while True:
+            next_id = process_pending_products(after_id=last_id)
+            if next_id is not None:
+                last_id = next_id
+                continue
+
+            if options['once']:
+                return
+            last_id = 0
+            time.sleep(options['poll_interval'])
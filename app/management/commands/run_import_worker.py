@@ -0,0 +1,31 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.product.jobs import claim_next_job, requeue_stale_jobs, run_import_job
+
+
+class Command(BaseCommand):
+    help = 'Processes queued product import jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=settings.IMPORT_WORKER_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f'Requeued {requeued} stale import jobs')
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Running import job {job.id}')
+            job = run_import_job(job)
+            self.stdout.write(
+                f'Import job {job.id} {job.status}: {job.processed_rows} rows processed, {job.failed_rows} failed'
+            )
@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2025-03-10 09:12
+
+import re
+from django.db import migrations, models
+
+
+def json_values(value):
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from json_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from json_values(item)
+    elif value is not None:
+        yield value
+
+
+def backfill_search_text(apps, schema_editor):
+    Product = apps.get_model('app', 'Product')
+    last_id = 0
+    while True:
+        batch = list(Product.objects.filter(id__gt=last_id).order_by('id')[:1000])
+        if not batch:
+            break
+        for product in batch:
+            parts = [product.sku, re.sub(r'\W+', '', product.sku or ''), product.name, product.description]
+            parts.extend(json_values(product.details))
+            product.search_text = ' '.join(str(part) for part in parts if part not in (None, ''))
+        Product.objects.bulk_update(batch, ['search_text'])
+        last_id = batch[-1].id
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('CREATE FULLTEXT INDEX app_product_search_ft ON app_product (search_text)')
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX app_product_search_ft ON app_product')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_rename_pictures_product_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_text',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_product_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productfamily',
+            name='attribute_groups',
+            field=models.ManyToManyField(related_name='families', through='app.ProductFamilyAttribute', to='app.attributegroup'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 15:21
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def resolve_duplicate_skus(apps, schema_editor):
+    """
+        Keeps the SKU on the live row that was updated last and renames the other copies to
+        "<sku>-dup-<id>" so the unique index can be built. Blank SKUs become NULL.
+    """
+    Product = apps.get_model('app', 'Product')
+    Product.objects.filter(sku='').update(sku=None)
+
+    duplicates = (Product.objects.exclude(sku=None).values('sku').annotate(copies=Count('id'))
+                  .filter(copies__gt=1).values_list('sku', flat=True))
+    for sku in list(duplicates):
+        products = list(Product.objects.filter(sku=sku).order_by(
+            F('deleted_at').asc(nulls_first=True), '-updated_at', '-id'
+        ))
+        for product in products[1:]:
+            suffix = f'-dup-{product.id}'
+            product.sku = f'{sku[:255 - len(suffix)]}{suffix}'
+            product.save(update_fields=['sku'])
+            print(f"Renamed duplicate sku {sku} on product {product.id} to {product.sku}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_importjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicate_skus, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_product_sku_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at', 'id'], name='product_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at', 'is_published', 'id'], name='product_live_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at', 'is_archived', 'is_published', 'id'], name='product_live_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at', 'updated_at', 'id'], name='product_live_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['family', 'deleted_at', 'id'], name='product_family_live_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+def mark_existing_images_pending(apps, schema_editor):
+    # Existing products get their variants from the image worker
+    Product = apps.get_model('app', 'Product')
+    Product.objects.filter(images__isnull=False).exclude(images=[]).update(variants_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='variants_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['variants_pending', 'id'], name='product_variants_pending_idx'),
+        ),
+        migrations.RunPython(mark_existing_images_pending, migrations.RunPython.noop),
+    ]
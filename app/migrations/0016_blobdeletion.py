@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_url', models.CharField(max_length=2047)),
+                ('blob_name', models.CharField(max_length=1023)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.CharField(blank=True, max_length=1023, null=True)),
+                ('not_before', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='blobdeletion',
+            index=models.Index(fields=['not_before', 'id'], name='app_blobdel_not_bef_77cc23_idx'),
+        ),
+    ]
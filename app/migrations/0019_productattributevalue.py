@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 15:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_soft_delete_managers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttributeValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(max_length=255)),
+                ('attribute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.attributegroup')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attribute_values', to='app.product')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='productattributevalue',
+            index=models.Index(fields=['attribute', 'value', 'product'], name='product_attribute_value_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productattributevalue',
+            constraint=models.UniqueConstraint(fields=('product', 'attribute', 'value'), name='product_attribute_value_unique'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_product_sort_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blobdeletion',
+            name='blob_name',
+            field=models.CharField(max_length=512),
+        ),
+        migrations.AddIndex(
+            model_name='blobdeletion',
+            index=models.Index(fields=['blob_name'], name='blobdeletion_blob_name_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2 on 2026-10-18 16:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def indexed_values(value):
+    values = value if isinstance(value, list) else [value]
+    for item in values:
+        if isinstance(item, bool):
+            yield 'true' if item else 'false'
+        elif isinstance(item, (str, int, float)):
+            yield str(item)[:255]
+
+
+def backfill_attribute_values(apps, schema_editor):
+    Product = apps.get_model('app', 'Product')
+    ProductFamilyAttribute = apps.get_model('app', 'ProductFamilyAttribute')
+    ProductAttributeValue = apps.get_model('app', 'ProductAttributeValue')
+
+    family_attributes = {}
+    links = (ProductFamilyAttribute.objects.filter(deleted_at=None, attribute__deleted_at=None)
+             .values_list('family_id', 'attribute_id', 'attribute__name'))
+    for family_id, attribute_id, name in links:
+        if name:
+            family_attributes.setdefault(family_id, {})[name.strip().lower()] = attribute_id
+
+    last_id = 0
+    while True:
+        batch = list(Product.objects.filter(id__gt=last_id).order_by('id').only('id', 'family_id', 'details')[:1000])
+        if not batch:
+            break
+        rows = set()
+        for product in batch:
+            attributes = family_attributes.get(product.family_id, {})
+            details = product.details if isinstance(product.details, dict) else {}
+            for key, value in details.items():
+                attribute_id = attributes.get(str(key).strip().lower())
+                if attribute_id:
+                    rows.update((product.id, attribute_id, item) for item in indexed_values(value))
+        ProductAttributeValue.objects.filter(product_id__in=[product.id for product in batch]).delete()
+        ProductAttributeValue.objects.bulk_create(
+            [ProductAttributeValue(product_id=product_id, attribute_id=attribute_id, value=value)
+             for product_id, attribute_id, value in rows]
+        )
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_blobdeletion_blob_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttributeRebuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('not_before', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('family', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.productfamily')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attributerebuild',
+            index=models.Index(fields=['not_before', 'id'], name='app_attribu_not_bef_d35dda_idx'),
+        ),
+        migrations.RunPython(backfill_attribute_values, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,42 @@
+import re
+from django.conf import settings
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.utils import timezone
+from app.cache import bump_version
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self, batch_size=None):
+        """
+            Marks the rows deleted in short id batches instead of one long locking statement and
+            returns the number of rows marked.
+        """
+        batch_size = batch_size or settings.SOFT_DELETE_BATCH_SIZE
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(self.filter(deleted_at=None).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            total += self.model.all_objects.filter(id__in=ids).update(deleted_at=now, updated_at=now)
+        if total:
+            model_name = self.model._meta.model_name
+            bump_version(model_name, f'{model_name}:bulk')  # update() does not send post_save
+        return total
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+        Default manager that hides soft-deleted rows; use all_objects to include them.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at=None)
+
+
+class ActiveUserManager(UserManager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at=None)
 
 
 class User(AbstractUser):
@@ -16,6 +53,9 @@ class User(AbstractUser):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
 
+    objects = ActiveUserManager()  # Default manager, so deleted users cannot authenticate
+    all_objects = UserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
@@ -30,13 +70,20 @@ class AttributeGroup(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
 
 class ProductFamily(models.Model):
     name = models.CharField(max_length=255, blank=True, null=True)
+    attribute_groups = models.ManyToManyField(AttributeGroup, through='ProductFamilyAttribute', related_name='families')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
 
 class ProductFamilyAttribute(models.Model):
     family = models.ForeignKey(ProductFamily, on_delete=models.CASCADE)
@@ -45,9 +92,12 @@ class ProductFamilyAttribute(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
 
 class Product(models.Model):
-    sku = models.CharField(max_length=255, blank=True, null=True)
+    sku = models.CharField(max_length=255, unique=True, blank=True, null=True)
     name = models.CharField(max_length=255, blank=True, null=True)
     description = models.CharField(max_length=4095, blank=True, null=True)
     price = models.FloatField(blank=True, null=True)
@@ -56,6 +106,152 @@ class Product(models.Model):
     images = models.JSONField(blank=True, null=True)
     is_archived = models.BooleanField(default=True)
     is_published = models.BooleanField(default=False)
+    image_variants = models.JSONField(blank=True, null=True)
+    variants_pending = models.BooleanField(default=False)
+    search_text = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    class Meta:
+        # Every listing filters on deleted_at first; id closes each index so the id-ordered
+        # page and cursor scans read rows in index order without a filesort
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='product_live_idx'),
+            models.Index(fields=['deleted_at', 'is_published', 'id'], name='product_live_published_idx'),
+            models.Index(fields=['deleted_at', 'is_archived', 'is_published', 'id'], name='product_live_archived_idx'),
+            models.Index(fields=['deleted_at', 'updated_at', 'id'], name='product_live_updated_idx'),
+            models.Index(fields=['deleted_at', 'name', 'id'], name='product_live_name_idx'),
+            models.Index(fields=['deleted_at', 'price', 'id'], name='product_live_price_idx'),
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='product_live_created_idx'),
+            models.Index(fields=['deleted_at', 'sku', 'id'], name='product_live_sku_idx'),
+            models.Index(fields=['updated_at', 'id'], name='product_updated_idx'),  # Change feed, tombstones included
+            models.Index(fields=['family', 'deleted_at', 'id'], name='product_family_live_idx'),
+            models.Index(fields=['variants_pending', 'id'], name='product_variants_pending_idx'),
+        ]
+
+    def refresh_search_text(self):
+        # Denormalized document behind the FULLTEXT index; the SKU is also stored without
+        # separators so prefix matches work for SKUs like "AB-1234"
+        parts = [self.sku, re.sub(r'\W+', '', self.sku or ''), self.name, self.description]
+        parts.extend(_json_values(self.details))
+        self.search_text = ' '.join(str(part) for part in parts if part not in (None, ''))
+
+    def refresh_variants_pending(self):
+        # image_variants maps each original URL to its derivatives; the image worker picks up
+        # products with an original that has no entry yet
+        variants = self.image_variants or {}
+        self.variants_pending = any(url not in variants for url in self.images or [])
+
+    def refresh_derived_fields(self):
+        self.refresh_search_text()
+        self.refresh_variants_pending()
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # Derived columns are only written along with the fields they are built from
+            update_fields = set(update_fields)
+            if update_fields & {'sku', 'name', 'description', 'details'}:
+                update_fields.add('search_text')
+            if update_fields & {'images', 'image_variants'}:
+                update_fields.add('variants_pending')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+
+class ProductAttributeValue(models.Model):
+    """
+        Indexed copy of the values in Product.details whose keys name one of the family's attribute
+        groups, so attribute filters seek (attribute, value) instead of decoding every details row.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attribute_values')
+    attribute = models.ForeignKey(AttributeGroup, on_delete=models.CASCADE)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['attribute', 'value', 'product'], name='product_attribute_value_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'attribute', 'value'], name='product_attribute_value_unique'),
+        ]
+
+
+class AttributeRebuild(models.Model):
+    """
+        A family whose products' attribute values need rebuilding, processed by run_attribute_worker
+        so requests that change attribute groups do not rewrite the index themselves.
+    """
+    family = models.ForeignKey(ProductFamily, on_delete=models.CASCADE)
+    not_before = models.DateTimeField()  # Claimed entries are skipped until then
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['not_before', 'id']),
+        ]
+
+
+def _json_values(value):
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _json_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _json_values(item)
+    elif value is not None:
+        yield value
+
+
+class ImportJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    file = models.FileField(upload_to='imports/', blank=True, null=True)
+    file_format = models.CharField(max_length=10, default='ndjson')
+    total_rows = models.IntegerField(blank=True, null=True)
+    processed_rows = models.IntegerField(default=0)
+    created_rows = models.IntegerField(default=0)
+    updated_rows = models.IntegerField(default=0)
+    failed_rows = models.IntegerField(default=0)
+    errors = models.JSONField(blank=True, null=True)
+    message = models.CharField(max_length=1023, blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+
+class BlobDeletion(models.Model):
+    file_url = models.CharField(max_length=2047)
+    blob_name = models.CharField(max_length=512)  # Indexed, so kept under MySQL's key length limit
+    attempts = models.IntegerField(default=0)
+    last_error = models.CharField(max_length=1023, blank=True, null=True)
+    not_before = models.DateTimeField()  # Claimed or backed-off entries are skipped until then
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['not_before', 'id']),
+            models.Index(fields=['blob_name'], name='blobdeletion_blob_name_idx'),
+        ]
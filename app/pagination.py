@@ -0,0 +1,232 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from app.cache import get_watermark
+
+
+CURSOR_KEYS = {
+    'id': ('id',),
+    'updated_at': ('updated_at', 'id'),
+}
+
+
+def encode_cursor(key, values):
+    payload = {'k': key, 'v': [value.isoformat() if isinstance(value, datetime) else value for value in values]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_value(field, value):
+    # Cursors come from clients, so every value is checked before it reaches a query
+    if field == 'id':
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError('Invalid cursor')
+    elif value is not None and field.endswith('_at'):
+        value = parse_datetime(value) if isinstance(value, str) else None
+        if value is None:
+            raise ValueError('Invalid cursor')
+    return value
+
+
+def decode_cursor(cursor, keys=CURSOR_KEYS):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        key = payload['k']
+        values = payload['v']
+        if not isinstance(key, str) or key not in keys or not isinstance(values, list) or len(values) != len(keys[key]):
+            raise ValueError('Invalid cursor')
+        decoded = [decode_value(field.lstrip('-'), value) for field, value in zip(keys[key], values)]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid cursor')
+    return key, decoded
+
+
+def clean_cursor_values(model, fields, values):
+    # Checks decoded values against the model fields, so e.g. a list in a price cursor is a 400
+    cleaned = []
+    for field, value in zip(fields, values):
+        model_field = model._meta.get_field(field.lstrip('-'))
+        if value is None:
+            if not model_field.null:
+                raise ValueError('Invalid cursor')
+        else:
+            if isinstance(value, (list, dict)):
+                raise ValueError('Invalid cursor')
+            try:
+                value = model_field.to_python(value)
+            except ValidationError:
+                raise ValueError('Invalid cursor')
+        cleaned.append(value)
+    return cleaned
+
+
+def get_ordering(model, fields):
+    """
+        order_by() arguments for fields ('-' for descending). Nullable fields place NULLs first
+        ascending and last descending, which is MySQL's own order, so MySQL still gets a plain
+        ORDER BY the index can serve and every backend agrees with seek_filter.
+    """
+    ordering = []
+    for field in fields:
+        name = field.lstrip('-')
+        if not model._meta.get_field(name).null:
+            ordering.append(field)
+        elif field.startswith('-'):
+            ordering.append(F(name).desc(nulls_last=True))
+        else:
+            ordering.append(F(name).asc(nulls_first=True))
+    return ordering
+
+
+def seek_after(model, field, value):
+    # Rows strictly after value in this column's direction, None when there are none
+    name = field.lstrip('-')
+    if field.startswith('-'):
+        if value is None:
+            return None
+        condition = Q(**{f'{name}__lt': value})
+        if model._meta.get_field(name).null:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+    if value is None:
+        return Q(**{f'{name}__isnull': False})
+    return Q(**{f'{name}__gt': value})
+
+
+def seek_filter(model, fields, values):
+    # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), with > following each field's direction
+    seek = Q(pk__in=[])
+    for i, field in enumerate(fields):
+        condition = seek_after(model, field, values[i])
+        if condition is None:
+            continue
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            name = prev_field.lstrip('-')
+            condition &= Q(**{f'{name}__isnull': True}) if prev_value is None else Q(**{name: prev_value})
+        seek |= condition
+    return seek
+
+
+def paginate_by_cursor(queryset, limit, cursor=None, key='id', keys=CURSOR_KEYS):
+    """
+        Keyset pagination: seeks past the last row of the previous page through the index
+        instead of using OFFSET, and never counts the full result set.
+    """
+    model = queryset.model
+    if cursor:
+        key, values = decode_cursor(cursor, keys)
+        values = clean_cursor_values(model, keys[key], values)
+        queryset = queryset.filter(seek_filter(model, keys[key], values))
+
+    fields = keys[key]
+    rows = list(queryset.order_by(*get_ordering(model, fields))[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(key, [getattr(last, field.lstrip('-')) for field in fields])
+
+    return rows, {
+        'limit': limit,
+        'cursor': cursor,
+        'next_cursor': next_cursor
+    }
+
+
+def iterate_by_keyset(queryset, chunk_size=2000):
+    """
+        Yields every row of the queryset in id order, one bounded query per chunk. MySQL drivers
+        buffer whole result sets client-side, so this is what keeps memory flat on large exports.
+    """
+    last_id = None
+    while True:
+        chunk = queryset.order_by('id')
+        if last_id is not None:
+            chunk = chunk.filter(id__gt=last_id)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1].id
+
+
+def get_exact_count(queryset):
+    """
+        COUNT(*) cached per compiled filter set; the key carries the model watermark, so any write
+        to the model, from any process, invalidates every cached count for it.
+    """
+    sql, params = queryset.query.sql_with_params()
+    watermark = get_watermark(queryset.model)
+    digest = hashlib.md5(f'{sql}{params!r}{watermark!r}'.encode()).hexdigest()
+    key = f'count:{queryset.model._meta.model_name}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def estimate_count(queryset):
+    """
+        Row estimate taken from the optimizer's table statistics via EXPLAIN. Returns None when
+        the database cannot provide one.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'mysql':
+        return None
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        columns = [col[0] for col in cursor.description]
+        row = cursor.fetchone()
+
+    if not row:
+        return None
+    plan = dict(zip(columns, row))
+    if plan.get('rows') is None:
+        return None
+    filtered = plan.get('filtered') or 100
+    return int(plan['rows'] * filtered / 100)
+
+
+def get_total_count(queryset, approximate=False):
+    if approximate:
+        estimate = estimate_count(queryset)
+        if estimate is not None and estimate >= settings.PAGINATION_APPROXIMATE_COUNT_THRESHOLD:
+            return estimate, False
+    return get_exact_count(queryset), True
+
+
+def paginate_by_page(queryset, page, limit, approximate=False, ordered_queryset=None):
+    start = 0
+    end = limit
+    if page > 1:
+        start = (page - 1) * limit
+        end = start + limit
+
+    rows = (ordered_queryset if ordered_queryset is not None else queryset)[start:end]
+    count, exact = get_total_count(queryset, approximate=approximate)
+
+    total_pages = (count + limit - 1) // limit  # Calculate total pages
+    next_page = page + 1 if end < count else None
+    prev_page = page - 1 if page > 1 else None
+
+    return rows, {
+        'page': page,
+        'limit': limit,
+        'total_pages': total_pages,
+        'prev_page': prev_page,
+        'next_page': next_page,
+        'total_count': count,
+        'count_exact': exact
+    }
@@ -0,0 +1,8 @@
+from rest_framework.parsers import JSONParser
+
+
+class MergePatchParser(JSONParser):
+    """
+        Accepts application/merge-patch+json (RFC 7386) bodies; views apply them with merge_patch.
+    """
+    media_type = 'application/merge-patch+json'
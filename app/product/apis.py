@@ -1,16 +1,39 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
 from rest_framework.permissions import AllowAny
 from app.permissions import IsAuth, IsAdmin
 from rest_framework.response import Response
+from datetime import timedelta
 from rest_framework import status
+from django.conf import settings
+from django.db import transaction, IntegrityError
 from django.db.models import Q
-from app.models import Product, ProductFamily, ProductFamilyAttribute
-from .serializers import ProductSerializer, AddProductSerializer, PaginationSerializer, AddMultipleProductSerializer
-from app.helpers import save_file_to_blob, delete_file_from_blob
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+from app.models import Product, ProductFamily, ProductFamilyAttribute, ImportJob
+from .serializers import (ProductSerializer, AddProductSerializer, PaginationSerializer, AddMultipleProductSerializer,
+                          ExportProductSerializer, ImportJobSerializer, SkuLookupSerializer, ProductChangesSerializer,
+                          ProductChangeSerializer, BulkUpdateSerializer, BulkFlagSerializer, FacetSerializer)
+from app.helpers import save_files_to_blob, release_files, get_variant_urls, merge_patch
+from app.parsers import MergePatchParser
+from app.pagination import paginate_by_cursor, paginate_by_page, encode_cursor, get_ordering, CURSOR_KEYS
+from app.cache import cache_response
+from app.search import rank_products
+from .filters import filter_products
+from .facets import get_facets
+from .sorting import SORT_KEYS
+from .etags import product_etag, product_last_modified, product_list_etag, get_updated_at, get_list_state
+from .export import export_rows, stream_ndjson, stream_csv
+from .importer import detect_format, import_products
+from .jobs import enqueue_import
+from .bulk import select_products, get_update_values, bulk_update_products
 
 
 @api_view(['GET'])
 @permission_classes([IsAuth])
+@condition(etag_func=product_list_etag)
+@cache_response('product', key_func=get_list_state)
 def get_products(request):
     req_ser = PaginationSerializer(data=request.GET)
     if not req_ser.is_valid():
@@ -21,55 +44,136 @@ def get_products(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     search = req_ser.validated_data.get('search', None)
-    archived = req_ser.validated_data.get('archived', None)
-    published = req_ser.validated_data.get('published', None)
     page = req_ser.validated_data.get('page', 1)
     limit = req_ser.validated_data.get('limit', 10)
-    start = 0
-    end = limit
-    if page > 1:
-        start = (page - 1) * limit
-        end = start + limit
+    cursor = req_ser.validated_data.get('cursor', None)
+    sort = req_ser.validated_data.get('sort', None)
+    cursor_key = sort or req_ser.validated_data.get('cursor_key', 'id')
+    use_cursor = cursor or req_ser.validated_data.get('pagination') == 'cursor'
+    approximate = req_ser.validated_data.get('count') == 'approximate'
 
-    filters = Q(deleted_at=None)
+    queryset = filter_products(req_ser.validated_data)
+    if use_cursor:
+        try:
+            products, pagination = paginate_by_cursor(queryset, limit, cursor=cursor, key=cursor_key, keys=SORT_KEYS)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e),
+                'code': status.HTTP_400_BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        if search and not sort:
+            ordered = rank_products(queryset, search)
+        else:
+            ordered = queryset.order_by(*get_ordering(Product, SORT_KEYS[sort or 'id']))
+        products, pagination = paginate_by_page(queryset, page, limit, approximate=approximate,
+                                                ordered_queryset=ordered)
+
+    serializer = ProductSerializer(products, many=True)
+    return Response({
+        'status': 'success',
+        'data': serializer.data,
+        'meta': {
+            'pagination': pagination
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuth])
+@cache_response('product', 'productfamily', 'attributegroup')
+def get_product_facets(request):
+    req_ser = FacetSerializer(data=request.GET)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    if search:
-        search_filters = Q(name__icontains=search)
-        filters &= search_filters
+    facets = get_facets(filter_products(req_ser.validated_data), facets=req_ser.validated_data.get('facets'),
+                        value_limit=req_ser.validated_data.get('value_limit'))
+    return Response({
+        'status': 'success',
+        'data': facets
+    }, status=status.HTTP_200_OK)
 
-    if archived:
-        archived_filters = Q(is_archived=True) & Q(is_published=False)
-        filters &= archived_filters
 
-    if published:
-        published_filters = Q(is_published=True)
-        filters &= published_filters
+@api_view(['GET'])
+@permission_classes([IsAuth])
+def export_products(request):
+    req_ser = ExportProductSerializer(data=request.GET)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    products = Product.objects.filter(filters)[start:end]
-    count = Product.objects.filter(filters).count()
+    file_format = req_ser.validated_data.get('file_format', 'ndjson')
+    rows = export_rows(filter_products(req_ser.validated_data))
+    if file_format == 'csv':
+        response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="products.csv"'
+    else:
+        response = StreamingHttpResponse(stream_ndjson(rows), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="products.ndjson"'
+    return response
 
-    total_pages = (count + limit - 1) // limit  # Calculate total pages
-    next_page = page + 1 if end < count else None
-    prev_page = page - 1 if page > 1 else None
 
-    serializer = ProductSerializer(products, many=True)
+@api_view(['GET'])
+@permission_classes([IsAuth])
+def get_product_changes(request):
+    req_ser = ProductChangesSerializer(data=request.GET)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    since = req_ser.validated_data.get('since', None)
+    cursor = req_ser.validated_data.get('cursor', None)
+    limit = req_ser.validated_data.get('limit', 100)
+
+    # Deleted products stay in the feed as tombstones. Rows from the last few seconds are held back:
+    # a transaction that commits late with an older updated_at would otherwise slip behind the cursor
+    queryset = Product.all_objects.filter(updated_at__lte=timezone.now() - timedelta(seconds=settings.CHANGE_FEED_LAG))
+    if since and not cursor:
+        queryset = queryset.filter(updated_at__gt=since)
+    try:
+        products, pagination = paginate_by_cursor(queryset, limit, cursor=cursor, key='updated_at',
+                                                 keys={'updated_at': CURSOR_KEYS['updated_at']})
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e),
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Unlike list pages the feed always hands back a position to resume from, so consumers keep
+    # polling with it once they have caught up
+    pagination['has_more'] = pagination['next_cursor'] is not None
+    if products and not pagination['next_cursor']:
+        pagination['next_cursor'] = encode_cursor('updated_at', [products[-1].updated_at, products[-1].id])
+    elif not products:
+        pagination['next_cursor'] = cursor
+
+    serializer = ProductChangeSerializer(products, many=True)
     return Response({
         'status': 'success',
         'data': serializer.data,
         'meta': {
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total_pages': total_pages,
-                'prev_page': prev_page,
-                'next_page': next_page
-            }
+            'pagination': pagination
         }
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuth])
+@condition(etag_func=product_etag, last_modified_func=product_last_modified)
+@cache_response('product:{pd_id}', 'product:bulk', key_func=get_updated_at)
 def get_product(request, pd_id):
     try:
         product = Product.objects.get(id=pd_id, deleted_at=None)
@@ -87,6 +191,47 @@ def get_product(request, pd_id):
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuth])
+def get_product_by_sku(request, sku):
+    try:
+        product = Product.objects.get(sku=sku, deleted_at=None)
+    except Product.DoesNotExist:
+        return Response({
+            'status': 'error',
+            'message': 'Product not found',
+            'code': 404
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = ProductSerializer(product)
+    return Response({
+        'status': 'success',
+        'data': serializer.data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuth])
+def get_products_by_skus(request):
+    req_ser = SkuLookupSerializer(data=request.data)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': 400
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    skus = list(dict.fromkeys(req_ser.validated_data['skus']))
+    products = Product.objects.filter(sku__in=skus, deleted_at=None)
+    serializer = ProductSerializer(products, many=True)
+    found = {product['sku'] for product in serializer.data}
+    return Response({
+        'status': 'success',
+        'data': serializer.data,
+        'missing': [sku for sku in skus if sku not in found]
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuth])
 def create_product(request):
@@ -100,14 +245,6 @@ def create_product(request):
 
     data = serializer.validated_data
     sku = data.get('sku')
-    already_exists = Product.objects.filter(sku=sku).exists()
-    if already_exists:
-        return Response({
-            'status': 'error',
-            'message': f'Product with sku {sku} already exist',
-            'code': status.HTTP_400_BAD_REQUEST
-        }, status=status.HTTP_400_BAD_REQUEST)
-
     name = data.get('name')
     description = data.get('description')
     price = data.get('price')
@@ -119,25 +256,46 @@ def create_product(request):
             family = None
     details = data.get('details', None)
     images = data.get('images', None)
-    product_images = []
-    if images:
-        for image in images:
-            image_url = save_file_to_blob(image)
-            product_images.append(image_url)
+    product_images = save_files_to_blob(images)
+    if product_images is None:
+        return Response({
+            'status': 'error',
+            'message': 'Error uploading product images',
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
     is_archived = data.get('is_archived')
     is_published = data.get('is_published')
 
-    product = Product.objects.create(
-        sku=sku,
-        name=name,
-        description=description,
-        price=price,
-        family=family,
-        details=details,
-        images=product_images,
-        is_archived=is_archived,
-        is_published=is_published,
-    )
+    replaced_files = []
+    try:
+        # The tombstone lookup and the INSERT are separate statements; the unique index on sku still
+        # rejects a concurrent duplicate, which surfaces as an IntegrityError
+        with transaction.atomic():
+            # A deleted product keeps its sku as a tombstone; creating the sku again brings that row back
+            product = Product.all_objects.select_for_update().filter(sku=sku).exclude(deleted_at=None).first()
+            if product:
+                replaced_files = (product.images or []) + get_variant_urls(product.image_variants)
+                product.deleted_at = None
+                product.image_variants = None
+            else:
+                product = Product(sku=sku)
+            product.name = name
+            product.description = description
+            product.price = price
+            product.family = family
+            product.details = details
+            product.images = product_images
+            product.is_archived = is_archived
+            product.is_published = is_published
+            product.save()
+    except IntegrityError:
+        release_files(product_images)
+        return Response({
+            'status': 'error',
+            'message': f'Product with sku {sku} already exist',
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+    release_files(replaced_files)
 
     serializer = ProductSerializer(product)
     return Response({
@@ -147,26 +305,103 @@ def create_product(request):
 
 
 @api_view(['POST'])
-@permission_classes([AllowAny])
+@permission_classes([IsAuth])
 def add_multiple_products(request):
     serializer = AddMultipleProductSerializer(data=request.data)
-    if serializer.is_valid():
-        product_objects = [Product(**data) for data in serializer.validated_data]
-        Product.objects.bulk_create(product_objects)  # Efficient bulk insert
+    if not serializer.is_valid():
+        return Response({
+            'status': 'error',
+            'message': serializer.errors,
+            'code': 400
+        }, status=400)
+
+    data = serializer.validated_data
+    file = data.get('file', None)
+    if file:
+        # Uploaded feeds are imported by the run_import_worker process so the request returns at once
+        job = enqueue_import(file, detect_format(file, data.get('file_format')), request.user)
         return Response({
             'status': 'success',
-            'message': f'{len(product_objects)} products inserted successfully'
-        }, status=status.HTTP_201_CREATED)
-    else:
+            'message': 'Import job queued',
+            'data': ImportJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+    rows = enumerate(data['products'], start=1)
+
+    result = import_products(rows)
+    if result.failed and not (result.created or result.updated):
         return Response({
             'status': 'error',
-            'message': serializer.errors,
+            'message': 'No products were imported',
+            'data': result.as_dict(),
             'code': 400
         }, status=400)
 
+    return Response({
+        'status': 'success',
+        'message': f'{result.created} products inserted and {result.updated} updated successfully',
+        'data': result.as_dict()
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuth])
+def get_import_job(request, job_id):
+    try:
+        job = ImportJob.objects.get(id=job_id)
+    except ImportJob.DoesNotExist:
+        return Response({
+            'status': 'error',
+            'message': 'Import job not found',
+            'code': 404
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = ImportJobSerializer(job)
+    return Response({
+        'status': 'success',
+        'data': serializer.data
+    }, status=status.HTTP_200_OK)
+
+
+def run_bulk_update(request, serializer_class, get_values):
+    req_ser = serializer_class(data=request.data)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    updated = bulk_update_products(select_products(req_ser.validated_data), get_values(req_ser.validated_data))
+    return Response({
+        'status': 'success',
+        'data': {
+            'updated': updated
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuth])
+def bulk_update(request):
+    return run_bulk_update(request, BulkUpdateSerializer, lambda data: get_update_values(data['changes']))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuth])
+def bulk_publish(request):
+    return run_bulk_update(request, BulkFlagSerializer, lambda data: {'is_published': data['value']})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuth])
+def bulk_archive(request):
+    return run_bulk_update(request, BulkFlagSerializer, lambda data: {'is_archived': data['value']})
+
 
 @api_view(['PATCH'])
 @permission_classes([IsAuth])
+@parser_classes([JSONParser, MergePatchParser, FormParser, MultiPartParser])
 def update_product(request, pd_id):
     try:
         product = Product.objects.get(id=pd_id, deleted_at=None)
@@ -177,7 +412,19 @@ def update_product(request, pd_id):
             'code': 404
         }, status=status.HTTP_404_NOT_FOUND)
 
-    serializer = ProductSerializer(product, data=request.data, partial=True)
+    data = request.data
+    if request.content_type.startswith(MergePatchParser.media_type):
+        if not isinstance(data, dict):
+            return Response({
+                'status': 'error',
+                'message': 'Merge patch must be a JSON object',
+                'code': 400
+            }, status=status.HTTP_400_BAD_REQUEST)
+        # Only the keys sent in details change; the rest of the document is kept
+        if 'details' in data:
+            data = {**data, 'details': merge_patch(product.details, data['details'])}
+
+    serializer = ProductSerializer(product, data=data, partial=True)
     if serializer.is_valid():
         serializer.save()
         return Response({
@@ -197,7 +444,9 @@ def update_product(request, pd_id):
 def delete_product(request, pd_id):
     try:
         product = Product.objects.get(id=pd_id, deleted_at=None)
-        product.delete()
+        # Soft delete: the row stays behind as a tombstone for the change feed
+        product.deleted_at = timezone.now()
+        product.save(update_fields=['deleted_at', 'updated_at'])
         return Response({
             'status': 'success',
             'message': 'Product deleted successfully'
@@ -0,0 +1,132 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from app.models import Product, ProductAttributeValue, ProductFamilyAttribute, AttributeGroup, AttributeRebuild
+from app.pagination import iterate_by_keyset
+from app.cache import bump_version
+
+
+def get_family_attributes(family_ids):
+    """
+        Returns {family id: {lowercased attribute group name: attribute group id}}.
+    """
+    attributes = defaultdict(dict)
+    links = (ProductFamilyAttribute.objects.filter(family_id__in=family_ids, attribute__deleted_at=None)
+             .values_list('family_id', 'attribute_id', 'attribute__name'))
+    for family_id, attribute_id, name in links:
+        if name:
+            attributes[family_id][name.strip().lower()] = attribute_id
+    return attributes
+
+
+def get_indexed_values(value):
+    values = value if isinstance(value, list) else [value]
+    for item in values:
+        if isinstance(item, bool):
+            yield 'true' if item else 'false'
+        elif isinstance(item, (str, int, float)):
+            yield str(item)[:255]
+
+
+def sync_attribute_values(products):
+    """
+        Rewrites the attribute value rows of the given products from their details and family.
+    """
+    products = list(products)
+    if not products:
+        return
+    family_attributes = get_family_attributes({product.family_id for product in products if product.family_id})
+
+    rows = set()
+    for product in products:
+        attributes = family_attributes.get(product.family_id, {})
+        details = product.details if isinstance(product.details, dict) else {}
+        for key, value in details.items():
+            attribute_id = attributes.get(str(key).strip().lower())
+            if attribute_id:
+                rows.update((product.id, attribute_id, item) for item in get_indexed_values(value))
+
+    with transaction.atomic():
+        ProductAttributeValue.objects.filter(product_id__in=[product.id for product in products]).delete()
+        ProductAttributeValue.objects.bulk_create(
+            [ProductAttributeValue(product_id=product_id, attribute_id=attribute_id, value=value)
+             for product_id, attribute_id, value in rows],
+            batch_size=settings.IMPORT_BATCH_SIZE
+        )
+
+
+def rebuild_attribute_values(queryset=None, batch_size=None):
+    """
+        Re-syncs every product in the queryset (all products by default) in id-ordered chunks and
+        returns the number of products processed.
+    """
+    queryset = Product.all_objects.all() if queryset is None else queryset
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    chunk = []
+    total = 0
+    for product in iterate_by_keyset(queryset.only('id', 'family_id', 'details'), chunk_size=batch_size):
+        chunk.append(product)
+        if len(chunk) >= batch_size:
+            sync_attribute_values(chunk)
+            total += len(chunk)
+            chunk = []
+    sync_attribute_values(chunk)
+    bump_version('product', 'product:bulk')  # Attribute filter results may have changed
+    return total + len(chunk)
+
+
+def rebuild_family_attribute_values(family_ids):
+    return rebuild_attribute_values(Product.all_objects.filter(family_id__in=family_ids))
+
+
+def queue_attribute_rebuild(family_ids):
+    """
+        Queues the families for run_attribute_worker. A family that is already waiting is not queued
+        twice; one that a worker has claimed is, since the worker may have read its links already.
+    """
+    family_ids = set(family_ids)
+    now = timezone.now()
+    waiting = (AttributeRebuild.objects.filter(family_id__in=family_ids, not_before__lte=now)
+               .values_list('family_id', flat=True))
+    AttributeRebuild.objects.bulk_create(
+        [AttributeRebuild(family_id=family_id, not_before=now) for family_id in family_ids - set(waiting)]
+    )
+
+
+def process_attribute_rebuilds(limit=100):
+    """
+        Rebuilds the attribute values of the next queued families and returns how many were rebuilt.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rebuilds = list(AttributeRebuild.objects.select_for_update(skip_locked=True)
+                        .filter(not_before__lte=now).order_by('not_before', 'id')[:limit])
+        AttributeRebuild.objects.filter(id__in=[rebuild.id for rebuild in rebuilds]).update(
+            not_before=now + timedelta(seconds=settings.ATTRIBUTE_REBUILD_LEASE)
+        )
+    if not rebuilds:
+        return 0
+
+    family_ids = {rebuild.family_id for rebuild in rebuilds}
+    rebuild_family_attribute_values(family_ids)
+    AttributeRebuild.objects.filter(id__in=[rebuild.id for rebuild in rebuilds]).delete()
+    return len(family_ids)
+
+
+def filter_by_attributes(queryset, attribute_filters):
+    """
+        Narrows a product queryset by [(attribute name, value)] pairs: values of the same attribute
+        are alternatives, different attributes must all match. Each attribute resolves through the
+        (attribute, value, product) index.
+    """
+    values_by_name = defaultdict(set)
+    for name, value in attribute_filters:
+        values_by_name[name.strip().lower()].add(value)
+
+    for name, values in values_by_name.items():
+        attribute_ids = AttributeGroup.objects.filter(name__iexact=name).values('id')
+        matching = ProductAttributeValue.objects.filter(attribute_id__in=attribute_ids, value__in=values)
+        queryset = queryset.filter(id__in=matching.values('product_id'))
+    return queryset
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from app.models import Product
+from app.cache import bump_version
+from .filters import filter_products
+from .attributes import sync_attribute_values
+
+
+def select_products(data):
+    """
+        Live products picked by exactly one of ids, skus or filter (the listing's filter semantics).
+    """
+    if 'ids' in data:
+        return Product.objects.filter(id__in=data['ids'])
+    if 'skus' in data:
+        return Product.objects.filter(sku__in=data['skus'])
+    return filter_products(data['filter'])
+
+
+def get_update_values(changes):
+    values = {field: changes[field] for field in ('price', 'is_published', 'is_archived') if field in changes}
+    if 'family' in changes:
+        values['family_id'] = changes['family']
+    if 'price_percent' in changes:
+        values['price'] = F('price') * (1 + changes['price_percent'] / 100)
+    return values
+
+
+def bulk_update_products(queryset, values, batch_size=None):
+    """
+        Applies values with one UPDATE per id batch, walking the selection by id so no statement
+        touches more than batch_size rows. Returns the number of rows updated.
+    """
+    batch_size = batch_size or settings.BULK_UPDATE_BATCH_SIZE
+    ids_queryset = queryset.order_by('id').values_list('id', flat=True)
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(ids_queryset.filter(id__gt=last_id)[:batch_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        # update() skips auto_now and post_save, so both are handled here once per batch
+        updated += Product.objects.filter(id__in=ids).update(**values, updated_at=timezone.now())
+        if 'family_id' in values:
+            sync_attribute_values(Product.objects.filter(id__in=ids).only('id', 'family_id', 'details'))
+        bump_version('product', 'product:bulk')
+    return updated
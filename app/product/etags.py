@@ -0,0 +1,42 @@
+import hashlib
+from app.models import Product
+from app.cache import get_query_params, get_watermark
+from .serializers import PaginationSerializer
+
+
+def get_updated_at(request, pd_id):
+    # condition() asks for the ETag and Last-Modified separately; one query answers both
+    if not hasattr(request, '_product_updated_at'):
+        request._product_updated_at = (Product.objects.filter(id=pd_id, deleted_at=None)
+                                       .values_list('updated_at', flat=True).first())
+    return request._product_updated_at
+
+
+def product_etag(request, pd_id):
+    updated_at = get_updated_at(request, pd_id)
+    if updated_at is None:
+        return None  # Let the view answer with its 404
+    return f'product-{pd_id}-{int(updated_at.timestamp() * 1000000)}'
+
+
+def product_last_modified(request, pd_id):
+    return get_updated_at(request, pd_id)
+
+
+def get_list_state(request):
+    """
+        Product watermark for list ETags and cached list responses, None for invalid filters. It is a
+        single MAX(updated_at) read from product_updated_idx, not an aggregate over the filtered set.
+    """
+    if not hasattr(request, '_product_list_state'):
+        req_ser = PaginationSerializer(data=request.GET)
+        request._product_list_state = get_watermark(Product) if req_ser.is_valid() else None
+    return request._product_list_state
+
+
+def product_list_etag(request):
+    state = get_list_state(request)
+    if state is None:
+        return None  # Let the view answer with its 400
+    digest = hashlib.md5(repr((request.path, get_query_params(request), state)).encode()).hexdigest()
+    return f'products-{digest}'
@@ -0,0 +1,65 @@
+import csv
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from app.models import ProductFamily
+from app.pagination import iterate_by_keyset
+from app.family.serializers import prefetch_attribute_groups
+
+
+EXPORT_COLUMNS = ['id', 'sku', 'name', 'description', 'price', 'family_id', 'family_name', 'attribute_groups',
+                  'details', 'images', 'is_archived', 'is_published', 'created_at', 'updated_at']
+
+
+class Echo:
+    # csv.writer target that hands each formatted line back instead of buffering it
+    def write(self, value):
+        return value
+
+
+def get_family_lookup():
+    # Families are few compared to products, so resolve them all once up front
+    families = prefetch_attribute_groups(ProductFamily.objects.all(), attribute_fields=['name'])
+    return {
+        family.id: (family.name, [group.name for group in family.active_attribute_groups])
+        for family in families
+    }
+
+
+def export_rows(queryset):
+    families = get_family_lookup()
+    queryset = queryset.defer('search_text')
+    for product in iterate_by_keyset(queryset, chunk_size=settings.EXPORT_CHUNK_SIZE):
+        family_name, attribute_groups = families.get(product.family_id, (None, []))
+        yield {
+            'id': product.id,
+            'sku': product.sku,
+            'name': product.name,
+            'description': product.description,
+            'price': product.price,
+            'family_id': product.family_id,
+            'family_name': family_name,
+            'attribute_groups': attribute_groups,
+            'details': product.details,
+            'images': product.images,
+            'is_archived': product.is_archived,
+            'is_published': product.is_published,
+            'created_at': product.created_at,
+            'updated_at': product.updated_at,
+        }
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        for column in ('attribute_groups', 'details', 'images'):
+            row[column] = json.dumps(row[column], cls=DjangoJSONEncoder)
+        for column in ('created_at', 'updated_at'):
+            row[column] = row[column].isoformat()
+        yield writer.writerow([row[column] for column in EXPORT_COLUMNS])
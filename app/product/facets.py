@@ -0,0 +1,60 @@
+from collections import defaultdict
+from django.conf import settings
+from django.db.models import Count, Q
+from app.models import ProductAttributeValue
+
+FACETS = ['family', 'status', 'attribute']
+
+
+def get_status_counts(queryset):
+    # One pass with conditional counts; the states mirror the archived/published list filters
+    return queryset.order_by().aggregate(
+        total=Count('id'),
+        published=Count('id', filter=Q(is_published=True)),
+        archived=Count('id', filter=Q(is_archived=True, is_published=False)),
+        draft=Count('id', filter=Q(is_archived=False, is_published=False)),
+    )
+
+
+def get_family_counts(queryset):
+    rows = (queryset.order_by().values('family_id', 'family__name')
+            .annotate(count=Count('id')).order_by('-count', 'family_id'))
+    return [{'id': row['family_id'], 'name': row['family__name'], 'count': row['count']} for row in rows]
+
+
+def get_attribute_counts(queryset, value_limit=None):
+    """
+        Counts per (attribute group, value) over the indexed attribute values of the matching
+        products, keeping the value_limit most frequent values of each attribute.
+    """
+    value_limit = value_limit or settings.FACET_VALUE_LIMIT
+    rows = (ProductAttributeValue.objects
+            .filter(product_id__in=queryset.order_by().values('id'), attribute__deleted_at=None)
+            .values('attribute_id', 'attribute__name', 'value')
+            .annotate(count=Count('id')).order_by('attribute_id', '-count', 'value'))
+
+    attributes = {}
+    values = defaultdict(list)
+    for row in rows:
+        attributes[row['attribute_id']] = row['attribute__name']
+        if len(values[row['attribute_id']]) < value_limit:
+            values[row['attribute_id']].append({'value': row['value'], 'count': row['count']})
+    return [{'id': attribute_id, 'name': name, 'values': values[attribute_id]}
+            for attribute_id, name in attributes.items()]
+
+
+def get_facets(queryset, facets=None, value_limit=None):
+    """
+        Counts for each requested facet over the filtered queryset, with one grouped query per facet
+        instead of a count() per facet value.
+    """
+    facets = facets or FACETS
+    status_counts = get_status_counts(queryset)
+    result = {'total_count': status_counts.pop('total')}
+    if 'status' in facets:
+        result['status'] = status_counts
+    if 'family' in facets:
+        result['family'] = get_family_counts(queryset)
+    if 'attribute' in facets:
+        result['attribute'] = get_attribute_counts(queryset, value_limit)
+    return result
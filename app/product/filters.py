@@ -0,0 +1,36 @@
+from django.db.models import Q
+from app.models import Product
+from app.search import search_products
+from .attributes import filter_by_attributes
+
+
+def filter_products(data):
+    """
+        Product queryset for the search/is_archived/is_published/family/attribute filters shared by
+        the listing, export, facet and bulk endpoints.
+    """
+    search = data.get('search', None)
+    archived = data.get('is_archived', None)
+    published = data.get('is_published', None)
+    family = data.get('family', None)
+    attribute_filters = data.get('attr', None)
+
+    filters = Q(deleted_at=None)
+
+    # Explicit False values narrow too: is_archived=false excludes the archived state
+    archived_filters = Q(is_archived=True) & Q(is_published=False)
+    if archived is not None:
+        filters &= archived_filters if archived else ~archived_filters
+
+    if published is not None:
+        filters &= Q(is_published=published)
+
+    if family is not None:
+        filters &= Q(family_id=family)
+
+    queryset = Product.objects.filter(filters)
+    if attribute_filters:
+        queryset = filter_by_attributes(queryset, attribute_filters)
+    if search:
+        queryset = search_products(queryset, search)
+    return queryset
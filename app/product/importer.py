@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+from django.conf import settings
+from django.db import connections, transaction
+from rest_framework.exceptions import ValidationError
+from app.models import Product, ProductFamily
+from app.cache import bump_version
+from .serializers import ImportProductSerializer
+from .attributes import sync_attribute_values
+
+
+IMPORT_FIELDS = ['name', 'description', 'price', 'family_id', 'details', 'images', 'is_archived', 'is_published']
+JSON_COLUMNS = ('details', 'images')
+
+
+def detect_format(file, file_format=None):
+    if file_format:
+        return file_format
+    return 'csv' if file.name.lower().endswith('.csv') else 'ndjson'
+
+
+def read_rows(file, file_format):
+    """
+        Yields (row_number, row) pairs from an uploaded NDJSON or CSV file without reading it
+        into memory. Rows that cannot be parsed are yielded as None so they count as failures.
+    """
+    stream = io.TextIOWrapper(file, encoding='utf-8-sig')
+    if file_format == 'csv':
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            row = {key: value for key, value in row.items() if key and value not in (None, '')}
+            try:
+                for column in JSON_COLUMNS:
+                    if column in row:
+                        row[column] = json.loads(row[column])
+            except ValueError:
+                row = None
+            yield row_number, row
+    else:
+        for row_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row_number, row
+
+
+def chunked(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors
+        }
+
+
+def validate_batch(batch, result):
+    validator = ImportProductSerializer()
+    valid = {}
+    for row_number, row in batch:
+        if not isinstance(row, dict):
+            result.add_error(row_number, 'Row is not a valid object')
+            continue
+        try:
+            data = validator.run_validation(row)
+        except ValidationError as e:
+            result.add_error(row_number, e.detail)
+            continue
+        # Later rows win when the same SKU appears twice in a batch
+        valid.pop(data['sku'], None)
+        valid[data['sku']] = (row_number, data)
+    return valid
+
+
+def resolve_families(valid, result):
+    family_ids = {data['family'] for _, data in valid.values() if data.get('family')}
+    families = set(ProductFamily.objects.filter(id__in=family_ids, deleted_at=None).values_list('id', flat=True))
+
+    resolved = {}
+    for sku, (row_number, data) in valid.items():
+        if 'family' in data:
+            family = data.pop('family')
+            if family and family not in families:
+                result.add_error(row_number, {'family': [f'Product family {family} does not exist']})
+                continue
+            data['family_id'] = family
+        resolved[sku] = data
+    return resolved
+
+
+def write_batch(rows):
+    """
+        Upserts the rows on the unique sku in one statement per batch. Existing rows are read first
+        so absent columns keep their values and derived fields see the merged product.
+    """
+    existing = {product.sku: product for product in Product.all_objects.filter(sku__in=list(rows))}
+    products = []
+    for sku, data in rows.items():
+        product = existing.get(sku) or Product()
+        for field, value in data.items():
+            setattr(product, field, value)
+        product.pk = None  # Inserted; a conflict on sku turns it into an update of the existing row
+        product.deleted_at = None
+        product.refresh_derived_fields()
+        products.append(product)
+
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target; other backends need the sku
+    features = connections[Product.all_objects.db].features
+    with transaction.atomic():
+        Product.all_objects.bulk_create(
+            products,
+            batch_size=settings.IMPORT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['sku'] if features.supports_update_conflicts_with_target else None,
+            update_fields=IMPORT_FIELDS + ['search_text', 'variants_pending', 'deleted_at', 'updated_at']
+        )
+        # Re-read by SKU: MySQL does not return the ids of upserted rows
+        sync_attribute_values(Product.all_objects.filter(sku__in=list(rows)).only('id', 'family_id', 'details'))
+    return len(rows) - len(existing), len(existing)
+
+
+def import_batch(batch, result):
+    result.processed += len(batch)
+    rows = resolve_families(validate_batch(batch, result), result)
+    if not rows:
+        return
+
+    created, updated = write_batch(rows)
+    result.created += created
+    result.updated += updated
+    bump_version('product', 'product:bulk')  # Bulk writes do not send post_save; invalidates every detail entry
+
+
+def import_products(rows, batch_size=None, on_batch=None):
+    result = ImportResult()
+    for batch in chunked(rows, batch_size or settings.IMPORT_BATCH_SIZE):
+        import_batch(batch, result)
+        if on_batch:
+            on_batch(result)
+    return result
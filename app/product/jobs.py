@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from app.models import ImportJob
+from .importer import read_rows, import_products
+
+
+def enqueue_import(file, file_format, user=None):
+    return ImportJob.objects.create(
+        file=file,
+        file_format=file_format,
+        created_by=user if user and user.is_authenticated else None
+    )
+
+
+def claim_next_job():
+    # SKIP LOCKED lets several workers poll the same table without handing out a job twice
+    with transaction.atomic():
+        job = (ImportJob.objects.select_for_update(skip_locked=True)
+               .filter(status=ImportJob.STATUS_QUEUED).order_by('id').first())
+        if job is None:
+            return None
+        job.status = ImportJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+        return job
+
+
+def requeue_stale_jobs():
+    """
+        Puts running jobs whose worker stopped reporting progress back on the queue. Re-running
+        is safe because imports upsert by SKU.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    return ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING, updated_at__lt=stale_before).update(
+        status=ImportJob.STATUS_QUEUED, processed_rows=0, created_rows=0, updated_rows=0, failed_rows=0,
+        updated_at=timezone.now()
+    )
+
+
+def count_rows(job):
+    with job.file.open('rb') as file:
+        total = sum(1 for _, row in read_rows(file, job.file_format))
+    return total
+
+
+def run_import_job(job):
+    try:
+        job.total_rows = count_rows(job)
+        job.save(update_fields=['total_rows', 'updated_at'])
+
+        def report_progress(result):
+            job.processed_rows = result.processed
+            job.created_rows = result.created
+            job.updated_rows = result.updated
+            job.failed_rows = result.failed
+            job.save(update_fields=['processed_rows', 'created_rows', 'updated_rows', 'failed_rows', 'updated_at'])
+
+        with job.file.open('rb') as file:
+            result = import_products(read_rows(file, job.file_format), on_batch=report_progress)
+
+        report_progress(result)
+        job.errors = result.errors
+        job.status = ImportJob.STATUS_COMPLETED
+    except Exception as e:
+        print(f"Error running import job {job.id}: {e}")
+        job.status = ImportJob.STATUS_FAILED
+        job.message = str(e)[:1023]
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['errors', 'status', 'message', 'finished_at', 'updated_at'])
+    job.file.delete(save=False)
+    return job
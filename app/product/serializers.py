@@ -1,5 +1,10 @@
 from rest_framework import serializers
-from app.models import Product
+from rest_framework.validators import UniqueValidator
+from django.conf import settings
+from django.utils import timezone
+from app.models import Product, ProductFamily, ImportJob
+from app.serializers import BasePaginationSerializer, ChangedFieldsModelSerializer
+from .sorting import SORT_CHOICES
 
 
 class AddProductSerializer(serializers.Serializer):
@@ -14,20 +19,176 @@ class AddProductSerializer(serializers.Serializer):
     is_published = serializers.BooleanField(required=False, default=False)
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(ChangedFieldsModelSerializer):
     class Meta:
         model = Product
-        fields = ['id', 'sku', 'name', 'description', 'price', 'family', 'details', 'images', 'is_archived',
-                  'is_published']
+        fields = ['id', 'sku', 'name', 'description', 'price', 'family', 'details', 'images', 'image_variants',
+                  'is_archived', 'is_published']
+        read_only_fields = ['image_variants']  # Written by the image worker only
+        # The default manager hides soft-deleted rows, which still hold their SKU
+        extra_kwargs = {'sku': {'validators': [UniqueValidator(queryset=Product.all_objects.all())]}}
 
 
 class AddMultipleProductSerializer(serializers.Serializer):
-    products = ProductSerializer(many=True)  # Accepts a list of product objects
+    products = serializers.ListField(child=serializers.DictField(), required=False)  # Inline JSON rows
+    file = serializers.FileField(required=False)  # NDJSON or CSV upload
+    file_format = serializers.ChoiceField(choices=['ndjson', 'csv'], required=False)
 
+    def validate(self, attrs):
+        if not attrs.get('products') and not attrs.get('file'):
+            raise serializers.ValidationError('Either products or file is required')
+        return attrs
 
-class PaginationSerializer(serializers.Serializer):
-    page = serializers.IntegerField(required=False)
-    limit = serializers.IntegerField(required=False)
-    search = serializers.CharField(required=False)
+
+class ImportProductSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=255)
+    name = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
+    description = serializers.CharField(max_length=4095, required=False, allow_null=True, allow_blank=True)
+    price = serializers.FloatField(required=False, allow_null=True)
+    family = serializers.IntegerField(required=False, allow_null=True)
+    details = serializers.JSONField(required=False, allow_null=True)
+    images = serializers.ListField(child=serializers.CharField(), required=False, allow_null=True)
     is_archived = serializers.BooleanField(required=False)
     is_published = serializers.BooleanField(required=False)
+
+
+class AttributeFilterField(serializers.CharField):
+    """
+        Parses an attribute filter of the form "Name:value" into a (name, value) pair.
+    """
+
+    def to_internal_value(self, data):
+        name, separator, value = super().to_internal_value(data).partition(':')
+        if not separator or not name.strip() or not value:
+            raise serializers.ValidationError('Expected an attribute filter of the form Name:value')
+        return name.strip(), value
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """
+        Query-string filters read by filter_products.
+    """
+    search = serializers.CharField(required=False)
+    # Nullable so a flag missing from the query string stays None instead of False
+    is_archived = serializers.BooleanField(required=False, allow_null=True)
+    is_published = serializers.BooleanField(required=False, allow_null=True)
+    family = serializers.IntegerField(required=False)
+    attr = serializers.ListField(child=AttributeFilterField(), required=False)  # ?attr=Color:red&attr=Size:M
+
+
+class PaginationSerializer(BasePaginationSerializer, ProductFilterSerializer):
+    sort = serializers.ChoiceField(choices=SORT_CHOICES, required=False)  # e.g. price or -price
+
+
+class FacetSerializer(ProductFilterSerializer):
+    facets = serializers.ListField(child=serializers.ChoiceField(choices=['family', 'status', 'attribute']),
+                                   required=False)
+    value_limit = serializers.IntegerField(required=False, min_value=1, max_value=settings.FACET_VALUE_LIMIT)
+
+
+class ProductChangesSerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)  # Watermark for the first request; later ones pass cursor
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=settings.CHANGE_FEED_MAX_LIMIT)
+
+
+class ProductChangeSerializer(serializers.ModelSerializer):
+    """
+        One change feed entry: the product for upserts, only its identity for deletes.
+    """
+    op = serializers.SerializerMethodField()
+    product = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ['op', 'id', 'sku', 'updated_at', 'deleted_at', 'product']
+
+    def get_op(self, obj):
+        return 'delete' if obj.deleted_at else 'upsert'
+
+    def get_product(self, obj):
+        return None if obj.deleted_at else ProductSerializer(obj).data
+
+
+class BulkFilterSerializer(ProductFilterSerializer):
+    def validate(self, attrs):
+        # An empty filter would select the whole catalogue; callers must say so with explicit criteria
+        if not any(value not in (None, []) for value in attrs.values()):
+            raise serializers.ValidationError('Filter needs at least one criterion')
+        return attrs
+
+
+class BulkSelectionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False,
+                                max_length=settings.BULK_UPDATE_MAX_KEYS)
+    skus = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False,
+                                 max_length=settings.BULK_UPDATE_MAX_KEYS)
+    filter = BulkFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if len([key for key in ('ids', 'skus', 'filter') if key in attrs]) != 1:
+            raise serializers.ValidationError('Exactly one of ids, skus or filter is required')
+        return attrs
+
+
+class BulkChangesSerializer(serializers.Serializer):
+    price = serializers.FloatField(required=False, allow_null=True)
+    price_percent = serializers.FloatField(required=False, min_value=-100)  # Relative change, e.g. -10 for 10% off
+    is_published = serializers.BooleanField(required=False)
+    is_archived = serializers.BooleanField(required=False)
+    family = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate_family(self, value):
+        if value is not None and not ProductFamily.objects.filter(id=value).exists():
+            raise serializers.ValidationError('Product family does not exist')
+        return value
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('No changes given')
+        if 'price' in attrs and 'price_percent' in attrs:
+            raise serializers.ValidationError('Use either price or price_percent')
+        return attrs
+
+
+class BulkUpdateSerializer(BulkSelectionSerializer):
+    changes = BulkChangesSerializer()
+
+
+class BulkFlagSerializer(BulkSelectionSerializer):
+    value = serializers.BooleanField(required=False, default=True)
+
+
+class ExportProductSerializer(ProductFilterSerializer):
+    file_format = serializers.ChoiceField(choices=['ndjson', 'csv'], required=False)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    throughput = serializers.SerializerMethodField()
+    eta_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'status', 'file_format', 'total_rows', 'processed_rows', 'created_rows', 'updated_rows',
+                  'failed_rows', 'throughput', 'eta_seconds', 'errors', 'message', 'started_at', 'finished_at',
+                  'created_at']
+
+    def get_throughput(self, obj):
+        # Rows per second since the worker picked the job up
+        if not obj.started_at:
+            return None
+        elapsed = ((obj.finished_at or timezone.now()) - obj.started_at).total_seconds()
+        return round(obj.processed_rows / elapsed, 2) if elapsed > 0 else None
+
+    def get_eta_seconds(self, obj):
+        if obj.status != ImportJob.STATUS_RUNNING or obj.total_rows is None:
+            return None
+        throughput = self.get_throughput(obj)
+        if not throughput:
+            return None
+        return round(max(obj.total_rows - obj.processed_rows, 0) / throughput)
+
+
+class SkuLookupSerializer(serializers.Serializer):
+    skus = serializers.ListField(child=serializers.CharField(), allow_empty=False,
+                                 max_length=settings.SKU_LOOKUP_MAX_SKUS)
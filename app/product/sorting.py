@@ -0,0 +1,9 @@
+SORT_FIELDS = ['name', 'price', 'created_at', 'updated_at', 'sku']
+
+# Sort key -> ordered fields; id breaks ties so equal values still page deterministically
+SORT_KEYS = {'id': ('id',)}
+for field in SORT_FIELDS:
+    SORT_KEYS[field] = (field, 'id')
+    SORT_KEYS[f'-{field}'] = (f'-{field}', '-id')
+
+SORT_CHOICES = [key for key in SORT_KEYS if key != 'id']
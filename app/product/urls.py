@@ -4,9 +4,18 @@ from app.product import apis
 
 urlpatterns = [
     path('', apis.get_products),
+    path('facets/', apis.get_product_facets),
+    path('export/', apis.export_products),
+    path('changes/', apis.get_product_changes),
     path('<int:pd_id>/', apis.get_product),
+    path('sku/<str:sku>/', apis.get_product_by_sku),
+    path('skus/', apis.get_products_by_skus),
     path('add/', apis.create_product),
     path('add/bulk/', apis.add_multiple_products),
+    path('bulk/update/', apis.bulk_update),
+    path('bulk/publish/', apis.bulk_publish),
+    path('bulk/archive/', apis.bulk_archive),
+    path('import/jobs/<int:job_id>/', apis.get_import_job),
     path('<int:pd_id>/update/', apis.update_product),
     path('<int:pd_id>/delete/', apis.delete_product),
 ]
@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from app.models import User, Product, ProductFamily, ProductFamilyAttribute, AttributeGroup
+from app.helpers import get_variant_urls, release_files
+
+
+def get_purgeable(deleted_before):
+    """
+        Soft-deleted rows past retention, in the order they can be removed without a hard delete
+        cascading into rows that are still live (e.g. a product restored into a deleted family).
+    """
+    return [
+        ProductFamilyAttribute.all_objects.filter(deleted_at__lt=deleted_before),
+        Product.all_objects.filter(deleted_at__lt=deleted_before),
+        ProductFamily.all_objects.filter(deleted_at__lt=deleted_before, product__isnull=True),
+        AttributeGroup.all_objects.filter(deleted_at__lt=deleted_before, productfamilyattribute__isnull=True),
+        User.all_objects.filter(deleted_at__lt=deleted_before),
+    ]
+
+
+def get_file_urls(model, ids):
+    if model is Product:
+        rows = Product.all_objects.filter(id__in=ids).values_list('images', 'image_variants')
+        return [url for images, variants in rows for url in (images or []) + get_variant_urls(variants)]
+    if model is User:
+        return list(User.all_objects.filter(id__in=ids).values_list('profile_picture', flat=True))
+    return []
+
+
+def purge_deleted(retention_days=None, batch_size=None, pause=0, dry_run=False):
+    """
+        Hard-deletes soft-deleted rows older than the retention period in small batches, each in its
+        own short transaction, and queues their blobs for the blob worker. Returns {model: rows}.
+    """
+    retention_days = settings.SOFT_DELETE_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    deleted_before = timezone.now() - timedelta(days=retention_days)
+
+    purged = {}
+    for queryset in get_purgeable(deleted_before):
+        model = queryset.model
+        label = model._meta.model_name
+        if dry_run:
+            purged[label] = queryset.count()
+            continue
+
+        purged[label] = 0
+        while True:
+            ids = list(queryset.order_by('id').values_list('id', flat=True).distinct()[:batch_size])
+            if not ids:
+                break
+            file_urls = get_file_urls(model, ids)
+            with transaction.atomic():
+                model.all_objects.filter(id__in=ids).delete()
+            release_files(file_urls)
+            purged[label] += len(ids)
+            if pause:
+                time.sleep(pause)  # Gives replicas and other writers room between batches
+    return purged
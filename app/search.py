@@ -0,0 +1,64 @@
+import re
+from django.conf import settings
+from django.db import connections
+from django.db.models import Lookup, FloatField, Q
+from django.db.models.expressions import RawSQL
+from app.models import Product
+
+
+class FullTextMatch(Lookup):
+    lookup_name = 'match'
+
+    def as_mysql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'MATCH ({lhs}) AGAINST ({rhs} IN BOOLEAN MODE)', lhs_params + rhs_params
+
+
+Product._meta.get_field('search_text').register_lookup(FullTextMatch)
+
+
+def build_boolean_query(search):
+    """
+        Turns free text into a MySQL boolean-mode query: every word is a required prefix, and for
+        single-token input a separator-free copy is an optional prefix so "AB-12" finds SKU "AB-1234".
+        Returns None when no word is long enough for the FULLTEXT parser to index.
+    """
+    min_length = settings.SEARCH_MIN_TOKEN_SIZE
+    terms = [term for term in re.findall(r'\w+', search) if len(term) >= min_length]
+    if not terms:
+        return None
+
+    query = ' '.join(f'+{term}*' for term in terms)
+    compact = re.sub(r'\W+', '', search)
+    if not re.search(r'\s', search.strip()) and compact != terms[0]:
+        query = f'({query}) {compact}*'
+    return query
+
+
+def use_fulltext(queryset):
+    return connections[queryset.db].vendor == 'mysql'
+
+
+def search_products(queryset, search):
+    query = build_boolean_query(search)
+    if query is None or not use_fulltext(queryset):
+        return queryset.filter(Q(search_text__icontains=search) | Q(sku__istartswith=search))
+    return queryset.filter(search_text__match=query)
+
+
+def rank_products(queryset, search):
+    """
+        Orders an already searched queryset by FULLTEXT relevance. MySQL evaluates the identical
+        MATCH expression once for both the WHERE clause and the ranking.
+    """
+    query = build_boolean_query(search)
+    if query is None or not use_fulltext(queryset):
+        return queryset.order_by('id')
+
+    relevance = RawSQL(
+        f'MATCH (`{Product._meta.db_table}`.`search_text`) AGAINST (%s IN BOOLEAN MODE)',
+        [query],
+        output_field=FloatField()
+    )
+    return queryset.annotate(search_rank=relevance).order_by('-search_rank', 'id')
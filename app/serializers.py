@@ -0,0 +1,55 @@
+from rest_framework import serializers
+from django.conf import settings
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+        Accepts an optional `fields` argument limiting which declared fields are serialized.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class BasePaginationSerializer(serializers.Serializer):
+    """
+        Page and cursor pagination parameters shared by the list endpoints; each module subclasses
+        it with its own filters.
+    """
+    page = serializers.IntegerField(required=False, min_value=1)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=settings.PAGINATION_MAX_LIMIT)
+    pagination = serializers.ChoiceField(choices=['page', 'cursor'], required=False)
+    cursor = serializers.CharField(required=False)
+    cursor_key = serializers.ChoiceField(choices=['id', 'updated_at'], required=False)
+    count = serializers.ChoiceField(choices=['exact', 'approximate'], required=False)
+
+
+class ChangedFieldsModelSerializer(serializers.ModelSerializer):
+    """
+        Updates write only the columns whose values changed and skip the query entirely for a no-op
+        patch. The changed field names are left on `changed_fields`.
+    """
+    def update(self, instance, validated_data):
+        self.changed_fields = []
+        for attr, value in validated_data.items():
+            field = instance._meta.get_field(attr)
+            new_value = value.pk if field.is_relation and value is not None else value
+            if getattr(instance, field.attname) != new_value:
+                setattr(instance, attr, value)
+                self.changed_fields.append(field.name)
+
+        if self.changed_fields:
+            instance.save(update_fields=[*self.changed_fields, 'updated_at'])
+        return instance
+
+
+def parse_fields(value, allowed):
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    invalid = set(fields) - set(allowed)
+    if invalid:
+        raise serializers.ValidationError(f"Invalid fields: {', '.join(sorted(invalid))}")
+    return fields
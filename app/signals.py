@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from app.models import User, Product, ProductFamily, ProductFamilyAttribute, AttributeGroup
+from app.cache import bump_version
+from app.product.attributes import sync_attribute_values
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductFamily)
+@receiver([post_save, post_delete], sender=ProductFamilyAttribute)
+@receiver([post_save, post_delete], sender=AttributeGroup)
+@receiver([post_save, post_delete], sender=User)
+def invalidate_model_version(sender, instance, **kwargs):
+    # The model version covers lists and counts, the per-object one cached detail responses
+    model_name = sender._meta.model_name
+    bump_version(model_name, f'{model_name}:{instance.pk}')
+
+
+@receiver(post_save, sender=Product)
+def sync_product_attribute_values(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or update_fields & {'details', 'family', 'family_id'}:
+        sync_attribute_values([instance])
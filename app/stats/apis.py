@@ -0,0 +1,14 @@
+from rest_framework.decorators import api_view, permission_classes
+from app.permissions import IsAdmin
+from rest_framework.response import Response
+from rest_framework import status
+from app.cache import get_cache_stats
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def get_response_cache_stats(request):
+    return Response({
+        'status': 'success',
+        'data': get_cache_stats()
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,7 @@
+from django.urls import path
+from app.stats import apis
+
+
+urlpatterns = [
+    path('cache/', apis.get_response_cache_stats),
+]
@@ -0,0 +1,220 @@
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+from django.conf import settings
+
+BATCH_DELETE_LIMIT = 256  # Most blobs Azure accepts in one batch delete request
+
+
+class AzureBlobStorage:
+    """
+        Azure Blob Storage backend. The SDK is imported and the client built on first use, so
+        management commands and tests that never touch blobs do not pay for it.
+    """
+    supports_direct_uploads = True
+
+    def __init__(self):
+        self.container_name = os.getenv('AZURE_BLOB_CONTAINER_NAME')
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.build_client()
+        return self._client
+
+    def build_client(self):
+        import requests
+        from azure.core.pipeline.transport import RequestsTransport
+        from azure.storage.blob import BlobServiceClient
+
+        # One keep-alive pool shared by every blob client; sized so each upload thread can run its
+        # parallel block uploads without waiting for, or discarding, a connection
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=settings.BLOB_CONNECTION_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        transport = RequestsTransport(
+            session=session,
+            session_owner=False,
+            connection_timeout=settings.BLOB_CONNECTION_TIMEOUT,
+            read_timeout=settings.BLOB_READ_TIMEOUT
+        )
+
+        # AZURE_STORAGE_CONNECTION_STRING can point at a local emulator such as Azurite
+        connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING') or (
+            f"DefaultEndpointsProtocol=https;AccountName={os.getenv('AZURE_STORAGE_ACCOUNT_NAME')};"
+            f"AccountKey={os.getenv('AZURE_STORAGE_KEY')};EndpointSuffix=core.windows.net"
+        )
+        return BlobServiceClient.from_connection_string(
+            connection_string,
+            transport=transport,
+            max_block_size=settings.BLOB_UPLOAD_BLOCK_SIZE,
+            max_single_put_size=settings.BLOB_UPLOAD_SINGLE_PUT_SIZE
+        )
+
+    def get_blob_client(self, blob_name):
+        return self.client.get_blob_client(container=self.container_name, blob=blob_name)
+
+    def get_url(self, blob_name):
+        return self.get_blob_client(blob_name).url
+
+    def get_blob_name(self, file_url):
+        container_url = f"{self.client.url.rstrip('/')}/{self.container_name}/"
+        file_url = file_url.split('?')[0]
+        if not file_url.startswith(container_url):
+            return None
+        return unquote(file_url[len(container_url):])
+
+    def exists(self, blob_name):
+        return self.get_blob_client(blob_name).exists()
+
+    def save(self, blob_name, content, length=None, content_type=None):
+        """
+            Stores content under blob_name unless a blob with that name exists already.
+        """
+        from azure.core.exceptions import ResourceExistsError
+        from azure.storage.blob import ContentSettings
+
+        blob_client = self.get_blob_client(blob_name)
+        try:
+            blob_client.upload_blob(
+                content,
+                length=length,
+                overwrite=False,
+                max_concurrency=settings.BLOB_UPLOAD_MAX_CONCURRENCY,
+                content_settings=ContentSettings(content_type=content_type)
+            )
+        except ResourceExistsError:
+            pass  # A concurrent writer stored the same content first
+        return blob_client.url
+
+    def read(self, blob_name):
+        downloader = self.get_blob_client(blob_name).download_blob(max_concurrency=settings.BLOB_UPLOAD_MAX_CONCURRENCY)
+        return downloader.readall()
+
+    def delete(self, blob_name):
+        self.get_blob_client(blob_name).delete_blob()
+
+    def delete_many(self, blob_names):
+        """
+            Deletes up to BATCH_DELETE_LIMIT blobs in one request and returns the names that could not
+            be deleted. Blobs that are already gone count as deleted.
+        """
+        container_client = self.client.get_container_client(self.container_name)
+        responses = container_client.delete_blobs(*blob_names, raise_on_any_failure=False)
+        return [name for name, response in zip(blob_names, responses) if response.status_code not in (202, 404)]
+
+    def list_blobs(self, prefix):
+        container_client = self.client.get_container_client(self.container_name)
+        for blob in container_client.list_blobs(name_starts_with=prefix):
+            yield blob.name, blob.last_modified
+
+    def get_upload_url(self, blob_name, expires_at):
+        from azure.storage.blob import BlobSasPermissions, generate_blob_sas
+
+        sas_token = generate_blob_sas(
+            account_name=self.client.account_name,
+            container_name=self.container_name,
+            blob_name=blob_name,
+            account_key=self.client.credential.account_key,
+            permission=BlobSasPermissions(create=True, write=True),
+            expiry=expires_at
+        )
+        return f"{self.get_url(blob_name)}?{sas_token}"
+
+
+class LocalFileStorage:
+    """
+        Stores blobs as files under BLOB_LOCAL_ROOT for development and tests. Direct client
+        uploads are not supported.
+    """
+    supports_direct_uploads = False
+
+    def __init__(self):
+        self.root = os.path.abspath(settings.BLOB_LOCAL_ROOT)
+        self.base_url = settings.BLOB_LOCAL_URL.rstrip('/') + '/'
+
+    def get_path(self, blob_name):
+        path = os.path.abspath(os.path.join(self.root, blob_name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f'Invalid blob name {blob_name}')
+        return path
+
+    def get_url(self, blob_name):
+        return f"{self.base_url}{quote(blob_name)}"
+
+    def get_blob_name(self, file_url):
+        file_url = file_url.split('?')[0]
+        if not file_url.startswith(self.base_url):
+            return None
+        return unquote(file_url[len(self.base_url):])
+
+    def exists(self, blob_name):
+        return os.path.exists(self.get_path(blob_name))
+
+    def save(self, blob_name, content, length=None, content_type=None):
+        path = self.get_path(blob_name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as destination:
+                if isinstance(content, bytes):
+                    destination.write(content)
+                else:
+                    shutil.copyfileobj(content, destination)
+            os.replace(temp_path, path)
+        return self.get_url(blob_name)
+
+    def read(self, blob_name):
+        with open(self.get_path(blob_name), 'rb') as file:
+            return file.read()
+
+    def delete(self, blob_name):
+        os.remove(self.get_path(blob_name))
+
+    def delete_many(self, blob_names):
+        failed = []
+        for blob_name in blob_names:
+            try:
+                self.delete(blob_name)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error deleting blob {blob_name}: {e}")
+                failed.append(blob_name)
+        return failed
+
+    def list_blobs(self, prefix):
+        for directory, _, file_names in os.walk(self.root):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                blob_name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if blob_name.startswith(prefix) and not blob_name.endswith('.tmp'):
+                    yield blob_name, datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+
+
+STORAGE_BACKENDS = {
+    'azure': AzureBlobStorage,
+    'local': LocalFileStorage,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_storage():
+    """
+        Returns the shared instance of the backend selected by BLOB_STORAGE_BACKEND.
+    """
+    name = settings.BLOB_STORAGE_BACKEND
+    if name not in _backends:
+        with _backends_lock:
+            if name not in _backends:
+                _backends[name] = STORAGE_BACKENDS[name]()
+    return _backends[name]
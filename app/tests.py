@@ -1,3 +1,476 @@
-from django.test import TestCase
+import base64
+import json
+import shutil
+import tempfile
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+from app.models import (User, AttributeGroup, ProductFamily, ProductFamilyAttribute, Product, ProductAttributeValue,
+                        AttributeRebuild)
+from app.product.importer import import_products
+from app import storage
+from app.blob_gc import process_deletions
+from app.helpers import merge_patch, release_files, save_bytes_to_blob
+from app.pagination import get_exact_count
+from app.product.attributes import process_attribute_rebuilds
 
-# Create your tests here.
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AppTestCase(TestCase):
+    """
+        Keeps cached versions and responses in memory, away from the shared cache of a running app.
+    """
+    def setUp(self):
+        cache.clear()
+
+
+class AuthenticatedTestCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', email='admin@lzaz.com'))
+
+
+class ProductFamilyListQueryCountTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.groups = [AttributeGroup.objects.create(name=f'Group {i}', values=['a', 'b']) for i in range(3)]
+
+    def add_families(self, count):
+        for i in range(count):
+            family = ProductFamily.objects.create(name=f'Family {ProductFamily.objects.count()}')
+            for group in self.groups:
+                ProductFamilyAttribute.objects.create(family=family, attribute=group)
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/families/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data['data']
+
+    def test_query_count_does_not_grow_with_families(self):
+        self.add_families(2)
+        small_count, _ = self.count_list_queries()
+
+        self.add_families(8)
+        large_count, data = self.count_list_queries()
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(data), 10)
+        self.assertEqual(len(data[0]['attribute_groups']), 3)
+
+    def test_deleted_attribute_groups_are_excluded(self):
+        self.add_families(1)
+        AttributeGroup.objects.filter(id=self.groups[0].id).update(deleted_at='2025-01-01T00:00:00Z')
+
+        _, data = self.count_list_queries()
+
+        self.assertEqual(len(data[0]['attribute_groups']), 2)
+
+
+class AttributeRebuildTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.group = AttributeGroup.objects.create(name='Color', values=['red'])
+        family = ProductFamily.objects.create(name='Shirts')
+        ProductFamilyAttribute.objects.create(family=family, attribute=self.group)
+        Product.objects.create(sku='SKU-1', name='p', description='d', price=1, family=family, details={'Color': 'red'})
+
+    def test_group_changes_queue_the_rebuild_of_its_families(self):
+        self.assertEqual(ProductAttributeValue.objects.count(), 1)
+
+        self.client.patch(f'/attributes/{self.group.id}/update/', {'name': 'Colour', 'values': ['red']}, format='json')
+        self.assertEqual(AttributeRebuild.objects.count(), 1)
+        self.client.delete(f'/attributes/{self.group.id}/delete/')
+
+        self.assertEqual(AttributeRebuild.objects.count(), 1)
+        self.assertEqual(process_attribute_rebuilds(), 1)
+        self.assertEqual(ProductAttributeValue.objects.count(), 0)
+        self.assertEqual(AttributeRebuild.objects.count(), 0)
+
+
+class ProductImportTest(AppTestCase):
+    def test_reimporting_a_deleted_sku_revives_it(self):
+        product = Product.objects.create(sku='SKU-1', name='orig', description='d', price=5)
+        Product.objects.filter(id=product.id).update(deleted_at=timezone.now())
+
+        result = import_products(enumerate([{'sku': 'SKU-1', 'name': 'new', 'description': 'd', 'price': 7}], 1))
+
+        self.assertEqual((result.created, result.updated), (0, 1))
+        product = Product.objects.get(id=product.id)
+        self.assertEqual((product.name, product.price, product.deleted_at), ('new', 7, None))
+
+    def test_upsert_keeps_columns_missing_from_the_row(self):
+        Product.objects.create(sku='SKU-1', name='orig', description='d', price=5, details={'color': 'red'})
+
+        result = import_products(enumerate([{'sku': 'SKU-1', 'name': 'new'}, {'sku': 'SKU-2', 'name': 'other'}], 1))
+
+        self.assertEqual((result.created, result.updated), (1, 1))
+        product = Product.objects.get(sku='SKU-1')
+        self.assertEqual((product.name, product.price, product.details), ('new', 5, {'color': 'red'}))
+        self.assertIn('new', product.search_text)
+        self.assertEqual(Product.objects.get(sku='SKU-2').name, 'other')
+
+
+class ProductBulkAddPermissionTest(AppTestCase):
+    def test_anonymous_callers_cannot_upsert(self):
+        Product.objects.create(sku='SKU-1', name='orig', description='d', price=5)
+
+        response = APIClient().post('/products/add/bulk/', {'products': [{'sku': 'SKU-1', 'name': 'new'}]},
+                                    format='json')
+
+        self.assertIn(response.status_code, (401, 403))
+        self.assertEqual(Product.objects.get(sku='SKU-1').name, 'orig')
+
+
+class ProductUpdateTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(sku='SKU-1', name='a', description='d', price=1)
+
+    def test_sku_of_deleted_product_is_rejected(self):
+        deleted = Product.objects.create(sku='SKU-2', name='b', description='d', price=1)
+        Product.objects.filter(id=deleted.id).update(deleted_at=timezone.now())
+
+        response = self.client.patch(f'/products/{self.product.id}/update/', {'sku': 'SKU-2'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sku', response.data['message'])
+
+
+class ProductPatchTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(sku='SKU-1', name='a', description='d', price=1,
+                                              details={'color': 'red', 'size': {'eu': 40, 'us': 7}})
+
+    def patch(self, data, content_type='application/json'):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.generic('PATCH', f'/products/{self.product.id}/update/', json.dumps(data),
+                                           content_type=content_type)
+        self.assertEqual(response.status_code, 200)
+        updates = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('UPDATE')]
+        return updates
+
+    def test_noop_patch_issues_no_update(self):
+        self.assertEqual(self.patch({'name': 'a', 'price': 1}), [])
+
+    def test_patch_writes_only_changed_columns(self):
+        updates = [sql for sql in self.patch({'name': 'b', 'price': 1}) if '"app_product"' in sql]
+
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"name"', updates[0])
+        self.assertNotIn('"price"', updates[0])
+        self.assertNotIn('"details"', updates[0])
+
+    def test_merge_patch_merges_details(self):
+        self.patch({'details': {'color': None, 'size': {'us': 8}, 'fit': 'slim'}}, 'application/merge-patch+json')
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.details, {'size': {'eu': 40, 'us': 8}, 'fit': 'slim'})
+
+    def test_merge_patch(self):
+        self.assertEqual(merge_patch({'a': 1, 'b': {'c': 2, 'd': 3}}, {'a': None, 'b': {'c': None, 'e': 4}}),
+                         {'b': {'d': 3, 'e': 4}})
+        self.assertEqual(merge_patch({'a': [1, 2]}, {'a': [3]}), {'a': [3]})
+        self.assertEqual(merge_patch({'a': 1}, ['x']), ['x'])
+        self.assertEqual(merge_patch(None, {'a': {'b': None}}), {'a': {}})
+
+
+class ProductStatusFilterTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Product.objects.create(sku=f'SKU-{i}', name='p', description='d', price=1,
+                                   is_published=i < 3, is_archived=i == 4)
+
+    def test_listing_filters_by_status(self):
+        response = self.client.get('/products/')
+        self.assertEqual(response.data['meta']['pagination']['total_count'], 5)
+
+        response = self.client.get('/products/', {'is_published': 'false'})
+        self.assertEqual(response.data['meta']['pagination']['total_count'], 2)
+
+        response = self.client.get('/products/', {'is_published': 'true'})
+        self.assertEqual(response.data['meta']['pagination']['total_count'], 3)
+
+        response = self.client.get('/products/', {'is_archived': 'true'})
+        self.assertEqual(response.data['meta']['pagination']['total_count'], 1)
+
+    def test_facets_filter_by_status(self):
+        response = self.client.get('/products/facets/', {'is_published': 'true', 'facets': 'status'})
+        self.assertEqual(response.data['data']['total_count'], 3)
+        self.assertEqual(response.data['data']['status'], {'published': 3, 'archived': 0, 'draft': 0})
+
+    def test_list_etag_follows_writes_from_other_processes(self):
+        etag = self.client.get('/products/')['ETag']
+        self.assertEqual(self.client.get('/products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # update() skips the signals that bump this process's cache versions, like a write elsewhere
+        Product.objects.filter(sku='SKU-0').update(price=2, updated_at=timezone.now())
+
+        response = self.client.get('/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn(2, [product['price'] for product in response.data['data']])
+
+    def test_export_filters_by_status(self):
+        response = self.client.get('/products/export/', {'is_published': 'true'})
+        rows = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(rows), 3)
+
+
+class ProductBulkUpdateTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.products = [Product.objects.create(sku=f'SKU-{i}', name='p', description='d', price=10,
+                                                is_published=i < 3) for i in range(5)]
+
+    def bulk_update(self, data):
+        return self.client.post('/products/bulk/update/', data, format='json')
+
+    def prices(self):
+        return list(Product.objects.order_by('id').values_list('price', flat=True))
+
+    def test_empty_filter_is_rejected(self):
+        response = self.bulk_update({'filter': {}, 'changes': {'price': 0}})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.prices(), [10] * 5)
+
+    def test_false_filter_selects_unpublished_products(self):
+        response = self.bulk_update({'filter': {'is_published': False}, 'changes': {'price': 0}})
+
+        self.assertEqual(response.data['data']['updated'], 2)
+        self.assertEqual(self.prices(), [10, 10, 10, 0, 0])
+
+    def test_update_by_skus_with_price_percent(self):
+        response = self.bulk_update({'skus': ['SKU-0', 'SKU-1'], 'changes': {'price_percent': -10}})
+
+        self.assertEqual(response.data['data']['updated'], 2)
+        self.assertEqual(self.prices(), [9, 9, 10, 10, 10])
+
+    def test_exactly_one_selection_is_required(self):
+        response = self.bulk_update({'ids': [self.products[0].id], 'skus': ['SKU-1'], 'changes': {'price': 0}})
+        self.assertEqual(response.status_code, 400)
+
+    def test_publish_by_ids(self):
+        response = self.client.post('/products/bulk/publish/', {'ids': [self.products[4].id]}, format='json')
+
+        self.assertEqual(response.data['data']['updated'], 1)
+        self.assertTrue(Product.objects.get(id=self.products[4].id).is_published)
+
+
+class PaginationValidationTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        Product.objects.create(sku='SKU-1', name='p', description='d', price=1)
+
+    def get_with_cursor(self, payload):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+        return self.client.get('/products/', {'cursor': cursor})
+
+    def test_malformed_cursors_are_rejected(self):
+        for payload in [{'k': 'id', 'v': 5}, {'k': 'id', 'v': ['5']}, {'k': ['id'], 'v': [5]},
+                        {'k': 'updated_at', 'v': [5, 1]}, ['id', [5]]]:
+            self.assertEqual(self.get_with_cursor(payload).status_code, 400, payload)
+
+    def test_change_feed_only_accepts_its_own_cursors(self):
+        cursor = base64.urlsafe_b64encode(json.dumps({'k': 'id', 'v': [1]}).encode()).decode().rstrip('=')
+        self.assertEqual(self.client.get('/products/changes/', {'cursor': cursor}).status_code, 400)
+
+    def test_sort_cursor_values_are_type_checked(self):
+        for payload in [{'k': 'price', 'v': [[1], 1]}, {'k': 'price', 'v': ['cheap', 1]},
+                        {'k': 'created_at', 'v': [None, 1]}]:
+            self.assertEqual(self.get_with_cursor(payload).status_code, 400, payload)
+
+    def test_limit_and_page_must_be_positive(self):
+        for params in [{'pagination': 'cursor', 'limit': 0}, {'pagination': 'cursor', 'limit': -1},
+                       {'limit': 100000}, {'page': 0}]:
+            self.assertEqual(self.client.get('/products/', params).status_code, 400, params)
+            self.assertEqual(self.client.get('/families/', params).status_code, 400, params)
+
+    def test_cached_counts_follow_writes_from_other_processes(self):
+        queryset = Product.objects.filter(is_published=False)
+        self.assertEqual(get_exact_count(queryset), 1)
+
+        # update() skips the signals that bump cache versions, like a write from another process
+        Product.objects.filter(sku='SKU-1').update(is_published=True, updated_at=timezone.now())
+
+        self.assertEqual(get_exact_count(queryset), 0)
+
+
+class ProductSortTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        prices = [None, 2.5, 1.0, None, 2.5, 3.0, 1.0, None]
+        self.products = [Product.objects.create(sku=f'SKU-{i}', name='p', description='d', price=price)
+                         for i, price in enumerate(prices)]
+
+    def walk(self, sort, limit=3):
+        ids = []
+        params = {'sort': sort, 'pagination': 'cursor', 'limit': limit}
+        while True:
+            response = self.client.get('/products/', params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(product['id'] for product in response.data['data'])
+            cursor = response.data['meta']['pagination']['next_cursor']
+            if not cursor:
+                return ids
+            params = {'cursor': cursor, 'limit': limit}
+
+    def expected(self, descending):
+        # NULLs first ascending and last descending, as MySQL orders them; id breaks ties
+        key = lambda product: (product.price is not None, product.price or 0, product.id)
+        return [product.id for product in sorted(self.products, key=key, reverse=descending)]
+
+    def test_cursor_pages_ascending_price(self):
+        for limit in (1, 2, 3, 8):
+            self.assertEqual(self.walk('price', limit), self.expected(False))
+
+    def test_cursor_pages_descending_price(self):
+        for limit in (1, 2, 3, 8):
+            self.assertEqual(self.walk('-price', limit), self.expected(True))
+
+    def test_page_mode_matches_cursor_order(self):
+        response = self.client.get('/products/', {'sort': '-price', 'limit': 8})
+        self.assertEqual([product['id'] for product in response.data['data']], self.expected(True))
+
+
+class LocalStorageTestCase(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        overrides = override_settings(BLOB_STORAGE_BACKEND='local', BLOB_LOCAL_ROOT=self.root, BLOB_GC_DELAY=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        storage._backends.clear()
+        self.addCleanup(storage._backends.clear)
+
+
+class BlobDeletionTest(LocalStorageTestCase):
+    def save_blobs(self, count):
+        return [save_bytes_to_blob(f'lzaz-pim/aa/blob-{i}.png', b'x', 'image/png') for i in range(count)]
+
+    def test_referenced_blobs_are_kept(self):
+        image, variant, picture, orphan = self.save_blobs(4)
+        Product.objects.create(sku='SKU-1', name='p', description='d', price=1, images=[image],
+                               image_variants={image: {'thumbnail': variant}})
+        User.objects.create(username='u', email='u@lzaz.com', profile_picture=picture)
+        release_files([image, variant, picture, orphan])
+
+        self.assertEqual(process_deletions(), (1, 3, 0))
+        stored = {name for name, _ in storage.get_storage().list_blobs('lzaz-pim/')}
+        self.assertEqual(stored, {'lzaz-pim/aa/blob-0.png', 'lzaz-pim/aa/blob-1.png', 'lzaz-pim/aa/blob-2.png'})
+
+    def test_other_url_forms_of_a_blob_count_as_references(self):
+        image, picture = self.save_blobs(2)
+        Product.objects.create(sku='SKU-1', name='p', description='d', price=1, images=[f'{image}?v=2'])
+        User.objects.create(username='u', email='u@lzaz.com',
+                            profile_picture='https://cdn.lzaz.com/lzaz-pim/aa/blob-1.png')
+        release_files([image, picture])
+
+        self.assertEqual(process_deletions(), (0, 2, 0))
+
+    def test_reusing_a_released_blob_cancels_its_deletion(self):
+        file_url, = self.save_blobs(1)
+        release_files([file_url])
+
+        self.assertEqual(save_bytes_to_blob('lzaz-pim/aa/blob-0.png', b'x', 'image/png'), file_url)
+
+        self.assertEqual(process_deletions(), (0, 0, 0))
+        self.assertTrue(storage.get_storage().exists('lzaz-pim/aa/blob-0.png'))
+
+    @override_settings(BLOB_GC_DELAY=300)
+    def test_released_blobs_wait_for_the_delay(self):
+        release_files(self.save_blobs(1))
+
+        self.assertEqual(process_deletions(), (0, 0, 0))
+        self.assertTrue(storage.get_storage().exists('lzaz-pim/aa/blob-0.png'))
+
+    def test_direct_uploads_are_rejected_by_local_storage(self):
+        response = self.client.post('/uploads/sas/', {'file_names': ['a.png']}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not supported', response.data['message'])
+
+    def test_reference_checks_do_not_grow_with_the_batch(self):
+        release_files(self.save_blobs(2))
+        with CaptureQueriesContext(connection) as small:
+            process_deletions()
+
+        release_files(self.save_blobs(20))
+        with CaptureQueriesContext(connection) as large:
+            process_deletions()
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class FinalizeUploadTest(LocalStorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.file_url = save_bytes_to_blob('lzaz-pim/uploads/abc/photo.png', b'x', 'image/png')
+        self.signed_url = f'{self.file_url}?sp=cw&sig=secret'
+
+    def test_product_images_are_stored_without_the_query_string(self):
+        product = Product.objects.create(sku='SKU-1', name='p', description='d', price=1)
+
+        response = self.client.post(f'/uploads/products/{product.id}/finalize/',
+                                    {'file_urls': [self.signed_url, self.file_url]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        product.refresh_from_db()
+        self.assertEqual(product.images, [self.file_url])
+
+    def test_profile_picture_is_stored_without_the_query_string(self):
+        user = User.objects.create(username='u', email='u@lzaz.com')
+
+        response = self.client.post(f'/uploads/users/{user.id}/finalize/', {'file_url': self.signed_url}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(user.profile_picture, self.file_url)
+
+
+class AddUserTest(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create(username='root', email='root@lzaz.com', role='admin'))
+
+    def add_user(self, password='secret-1'):
+        return self.client.post('/users/add/', {'name': 'Ann', 'email': 'ann@lzaz.com', 'role': 'user',
+                                                'password': password})
+
+    def test_email_of_a_live_user_is_rejected(self):
+        self.assertEqual(self.add_user().status_code, 201)
+        self.assertEqual(self.add_user().status_code, 400)
+
+    def test_adding_a_deleted_users_email_revives_the_row(self):
+        user_id = self.add_user().data['data']['id']
+        self.client.delete(f'/users/{user_id}/delete/')
+
+        response = self.add_user(password='secret-2')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['id'], user_id)
+        user = User.objects.get(id=user_id)
+        self.assertTrue(user.check_password('secret-2'))
+
+
+class CacheStatsTest(AuthenticatedTestCase):
+    def test_stats_are_served_by_the_app(self):
+        self.client.get('/families/')
+        self.client.get('/families/')
+        self.client.force_authenticate(User.objects.create(username='root', email='root@lzaz.com', role='admin'))
+
+        response = self.client.get('/stats/cache/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['app.family.apis.get_product_families'], {'hit': 1, 'miss': 1})
+
+    def test_stats_require_an_admin(self):
+        self.assertEqual(self.client.get('/stats/cache/').status_code, 403)
@@ -0,0 +1,130 @@
+from rest_framework.decorators import api_view, permission_classes
+from app.permissions import IsAuth
+from rest_framework.response import Response
+from rest_framework import status
+from app.models import Product, User
+from .serializers import UploadUrlSerializer, FinalizeProductImagesSerializer, FinalizeProfilePictureSerializer
+from app.helpers import generate_upload_url, is_uploaded_blob, release_file, get_canonical_url
+from app.storage import get_storage
+from app.product.serializers import ProductSerializer
+from app.user.serializers import UserSerializer
+
+
+@api_view(['POST'])
+@permission_classes([IsAuth])
+def get_upload_urls(request):
+    req_ser = UploadUrlSerializer(data=request.data)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not get_storage().supports_direct_uploads:
+        return Response({
+            'status': 'error',
+            'message': 'Direct uploads are not supported by the configured blob storage',
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        uploads = [generate_upload_url(file_name) for file_name in req_ser.validated_data['file_names']]
+    except Exception as e:
+        print("Error generating upload urls: ", str(e))
+        return Response({
+            'status': 'error',
+            'message': 'Error generating upload urls',
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'status': 'success',
+        'data': uploads
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuth])
+def finalize_product_images(request, pd_id):
+    req_ser = FinalizeProductImagesSerializer(data=request.data)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        product = Product.objects.get(id=pd_id, deleted_at=None)
+    except Product.DoesNotExist:
+        return Response({
+            'status': 'error',
+            'message': 'Product not found',
+            'code': 404
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    file_urls = req_ser.validated_data['file_urls']
+    invalid = [file_url for file_url in file_urls if not is_uploaded_blob(file_url)]
+    if invalid:
+        return Response({
+            'status': 'error',
+            'message': {'file_urls': [f'File has not been uploaded: {file_url}' for file_url in invalid]},
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    images = product.images or []
+    for file_url in file_urls:
+        file_url = get_canonical_url(file_url)
+        if file_url not in images:
+            images = images + [file_url]
+    product.images = images
+    product.save(update_fields=['images', 'updated_at'])
+
+    serializer = ProductSerializer(product)
+    return Response({
+        'status': 'success',
+        'data': serializer.data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuth])
+def finalize_profile_picture(request, user_id):
+    req_ser = FinalizeProfilePictureSerializer(data=request.data)
+    if not req_ser.is_valid():
+        return Response({
+            'status': 'error',
+            'message': req_ser.errors,
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user = User.objects.get(id=user_id, deleted_at=None)
+    except User.DoesNotExist:
+        return Response({
+            'status': 'error',
+            'message': 'User not found',
+            'code': 404
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    file_url = req_ser.validated_data['file_url']
+    if not is_uploaded_blob(file_url):
+        return Response({
+            'status': 'error',
+            'message': 'File has not been uploaded',
+            'code': status.HTTP_400_BAD_REQUEST
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    file_url = get_canonical_url(file_url)
+    previous_picture = user.profile_picture
+    user.profile_picture = file_url
+    user.save(update_fields=['profile_picture', 'updated_at'])
+    if previous_picture and previous_picture != file_url:
+        release_file(previous_picture)
+
+    serializer = UserSerializer(user)
+    return Response({
+        'status': 'success',
+        'data': serializer.data
+    }, status=status.HTTP_200_OK)
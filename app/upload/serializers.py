@@ -0,0 +1,16 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class UploadUrlSerializer(serializers.Serializer):
+    file_names = serializers.ListField(child=serializers.CharField(max_length=255), allow_empty=False,
+                                       max_length=settings.BLOB_UPLOAD_MAX_FILES)
+
+
+class FinalizeProductImagesSerializer(serializers.Serializer):
+    file_urls = serializers.ListField(child=serializers.URLField(max_length=2047), allow_empty=False,
+                                      max_length=settings.BLOB_UPLOAD_MAX_FILES)
+
+
+class FinalizeProfilePictureSerializer(serializers.Serializer):
+    file_url = serializers.URLField(max_length=2047)
@@ -0,0 +1,9 @@
+from django.urls import path
+from app.upload import apis
+
+
+urlpatterns = [
+    path('sas/', apis.get_upload_urls),
+    path('products/<int:pd_id>/finalize/', apis.finalize_product_images),
+    path('users/<int:user_id>/finalize/', apis.finalize_profile_picture),
+]
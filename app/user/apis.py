@@ -7,10 +7,12 @@ from rest_framework import status
 from django.db.models import Q
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.utils import timezone
 from app.models import User
 from .serializers import (AddUserSerializer, LoginSerializer, UserSerializer, ResetPasswordSerializer,
                           PaginationSerializer)
-from app.helpers import save_file_to_blob, delete_file_from_blob, generate_random_string, send_email
+from app.helpers import save_file_to_blob, release_file, generate_random_string, send_email
+from app.pagination import paginate_by_cursor, paginate_by_page
 
 
 @api_view(['POST'])
@@ -71,36 +73,35 @@ def get_users(request):
     search = req_ser.validated_data.get('search', None)
     page = req_ser.validated_data.get('page', 1)
     limit = req_ser.validated_data.get('limit', 10)
-    start = 0
-    end = limit
-    if page > 1:
-        start = (page - 1) * limit
-        end = start + limit
+    cursor = req_ser.validated_data.get('cursor', None)
+    cursor_key = req_ser.validated_data.get('cursor_key', 'id')
+    use_cursor = cursor or req_ser.validated_data.get('pagination') == 'cursor'
+    approximate = req_ser.validated_data.get('count') == 'approximate'
 
     filters = Q(deleted_at=None)
     if search:
         search_filters = Q(name__icontains=search) | Q(email__icontains=search) | Q(role__icontains=search)
         filters &= search_filters
 
-    users = User.objects.filter(filters)[start:end]
-    count = User.objects.filter(filters).count()
-
-    total_pages = (count + limit - 1) // limit  # Calculate total pages
-    next_page = page + 1 if end < count else None
-    prev_page = page - 1 if page > 1 else None
+    queryset = User.objects.filter(filters)
+    if use_cursor:
+        try:
+            users, pagination = paginate_by_cursor(queryset, limit, cursor=cursor, key=cursor_key)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e),
+                'code': status.HTTP_400_BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        users, pagination = paginate_by_page(queryset, page, limit, approximate=approximate)
 
     serializer = UserSerializer(users, many=True)
     return Response({
         'status': 'success',
         'data': serializer.data,
         'meta': {
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total_pages': total_pages,
-                'prev_page': prev_page,
-                'next_page': next_page
-            }
+            'pagination': pagination
         }
     }, status=status.HTTP_200_OK)
 
@@ -122,29 +123,47 @@ def add_user(request):
     role = signup_data['role']
     password = signup_data['password']
     picture = signup_data['picture'] if 'picture' in signup_data else None
-    picture_url = None
-    if picture:
-        picture_url = save_file_to_blob(picture)
-    already_exists = User.objects.filter(email=email).exists()
-    if already_exists:
+    # A deleted user keeps the email until purged; adding the email again brings that row back
+    user = User.all_objects.filter(email=email).first()
+    if user and user.deleted_at is None:
         return Response({
             'status': 'error',
             'message': 'Email already registered',
             'code': status.HTTP_400_BAD_REQUEST
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    user = User.objects.create_user(
-        name=name,
-        email=email,
-        username=email,
-        role=role,
-        profile_picture=picture_url,
-        hash=generate_random_string(),
-        secret=generate_random_string(),
-    )
+    picture_url = None
+    if picture:
+        picture_url = save_file_to_blob(picture)
+
+    previous_picture = None
+    if user:
+        previous_picture = user.profile_picture
+        user.name = name
+        user.username = email
+        user.role = role
+        user.profile_picture = picture_url
+        user.hash = generate_random_string()
+        user.secret = generate_random_string()
+        user.hash_secret_expired = False
+        user.forgot_password = False
+        user.account_access = True
+        user.deleted_at = None
+    else:
+        user = User.objects.create_user(
+            name=name,
+            email=email,
+            username=email,
+            role=role,
+            profile_picture=picture_url,
+            hash=generate_random_string(),
+            secret=generate_random_string(),
+        )
 
     user.set_password(password)
     user.save()
+    if previous_picture and previous_picture != picture_url:
+        release_file(previous_picture)
     serializer = UserSerializer(user)
     return Response({
         'status': 'success',
@@ -161,27 +180,16 @@ def update_user(request, user_id):
         # Check if a new profile picture is provided in the request data
         new_profile_picture = request.data.get('profile_picture', None)
 
+        previous_picture = user.profile_picture
         if new_profile_picture:
-            same_picture = False
-            # Delete the old profile picture from blob
-            if user.profile_picture:
-                prev_picture_name = user.profile_picture.split('/')[-1]
-                new_picture_name = new_profile_picture.name
-                if prev_picture_name != new_picture_name:
-                    delete_file_from_blob(user.profile_picture)
-                else:
-                    same_picture = True
-
-            if not same_picture:
-                # Save the new profile picture to S3
-                profile_picture_url = save_file_to_blob(new_profile_picture)
-                request.data['profile_picture'] = profile_picture_url
-            else:
-                request.data['profile_picture'] = user.profile_picture
+            # Blobs are content-addressed, so re-uploading the same picture returns the same URL
+            request.data['profile_picture'] = save_file_to_blob(new_profile_picture)
 
         serializer = UserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            if previous_picture and previous_picture != user.profile_picture:
+                release_file(previous_picture)
             return Response({
                 'status': 'success',
                 'data': serializer.data
@@ -206,7 +214,8 @@ def update_user(request, user_id):
 def delete_user(request, user_id):
     try:
         user = User.objects.get(id=user_id)
-        user.delete()
+        user.deleted_at = timezone.now()
+        user.save(update_fields=['deleted_at', 'updated_at'])
         return Response({
             'status': 'success',
             'message': 'User deleted',
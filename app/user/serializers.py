@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from app.models import User
+from app.serializers import BasePaginationSerializer, ChangedFieldsModelSerializer
 
 
 class AddUserSerializer(serializers.Serializer):
@@ -15,10 +17,12 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(required=True)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ChangedFieldsModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'name', 'email', 'role', 'profile_picture', 'account_access']
+        # The default manager hides soft-deleted users, which still hold their email
+        extra_kwargs = {'email': {'validators': [UniqueValidator(queryset=User.all_objects.all())]}}
 
 
 class ResetPasswordSerializer(serializers.Serializer):
@@ -27,7 +31,5 @@ class ResetPasswordSerializer(serializers.Serializer):
     secret = serializers.CharField(required=True)
 
 
-class PaginationSerializer(serializers.Serializer):
-    page = serializers.IntegerField(required=False)
-    limit = serializers.IntegerField(required=False)
+class PaginationSerializer(BasePaginationSerializer):
     search = serializers.CharField(required=False)
@@ -97,6 +97,108 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Cache versions, counters and cached responses must be shared by every web and worker process,
+# or writes made elsewhere never invalidate them: Redis when REDIS_URL is set (needs the redis
+# package), otherwise files under CACHE_DIR, which processes on one host share
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'KEY_PREFIX': 'lzaz-pim',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', BASE_DIR / 'cache'),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+            },
+        }
+    }
+
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))  # Seconds; writes invalidate entries earlier
+
+
+# Pagination Settings
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 300))  # Seconds
+PAGINATION_APPROXIMATE_COUNT_THRESHOLD = int(os.getenv('PAGINATION_APPROXIMATE_COUNT_THRESHOLD', 100000))
+PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', 1000))  # Largest page size a client may ask for
+
+
+# Search Settings
+SEARCH_MIN_TOKEN_SIZE = int(os.getenv('SEARCH_MIN_TOKEN_SIZE', 3))  # Keep in sync with innodb_ft_min_token_size
+
+
+# Export Settings
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+
+# Import Settings
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv('IMPORT_MAX_REPORTED_ERRORS', 1000))
+IMPORT_JOB_STALE_AFTER = int(os.getenv('IMPORT_JOB_STALE_AFTER', 600))  # Seconds without progress
+IMPORT_WORKER_POLL_INTERVAL = float(os.getenv('IMPORT_WORKER_POLL_INTERVAL', 2))  # Seconds
+SKU_LOOKUP_MAX_SKUS = int(os.getenv('SKU_LOOKUP_MAX_SKUS', 1000))
+
+
+# Bulk Update Settings
+BULK_UPDATE_BATCH_SIZE = int(os.getenv('BULK_UPDATE_BATCH_SIZE', 1000))  # Rows per UPDATE statement
+BULK_UPDATE_MAX_KEYS = int(os.getenv('BULK_UPDATE_MAX_KEYS', 10000))  # ids or skus per request
+
+
+# Soft Delete Settings
+SOFT_DELETE_BATCH_SIZE = int(os.getenv('SOFT_DELETE_BATCH_SIZE', 1000))  # Rows marked per statement when cascading
+SOFT_DELETE_RETENTION_DAYS = int(os.getenv('SOFT_DELETE_RETENTION_DAYS', 30))  # Days before purge_deleted removes rows
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 500))  # Rows hard-deleted per transaction
+
+
+# Change Feed Settings
+CHANGE_FEED_MAX_LIMIT = int(os.getenv('CHANGE_FEED_MAX_LIMIT', 1000))
+CHANGE_FEED_LAG = int(os.getenv('CHANGE_FEED_LAG', 5))  # Seconds; rows this recent may still have commits in flight
+
+# Facet Settings
+FACET_VALUE_LIMIT = int(os.getenv('FACET_VALUE_LIMIT', 50))  # Most frequent values returned per attribute
+
+
+# Attribute Index Settings
+ATTRIBUTE_REBUILD_LEASE = int(os.getenv('ATTRIBUTE_REBUILD_LEASE', 600))  # Seconds before a claimed rebuild is retried
+ATTRIBUTE_WORKER_POLL_INTERVAL = float(os.getenv('ATTRIBUTE_WORKER_POLL_INTERVAL', 5))  # Seconds
+
+
+# Blob Storage Settings
+BLOB_STORAGE_BACKEND = os.getenv('BLOB_STORAGE_BACKEND', 'azure')  # 'azure' or 'local'
+BLOB_UPLOAD_MAX_WORKERS = int(os.getenv('BLOB_UPLOAD_MAX_WORKERS', 8))  # Parallel uploads per request
+BLOB_UPLOAD_BLOCK_SIZE = int(os.getenv('BLOB_UPLOAD_BLOCK_SIZE', 4 * 1024 * 1024))  # Bytes per staged block
+BLOB_UPLOAD_SINGLE_PUT_SIZE = int(os.getenv('BLOB_UPLOAD_SINGLE_PUT_SIZE', 8 * 1024 * 1024))  # Larger files use blocks
+BLOB_UPLOAD_MAX_CONCURRENCY = int(os.getenv('BLOB_UPLOAD_MAX_CONCURRENCY', 4))  # Parallel blocks per file
+BLOB_UPLOAD_SAS_EXPIRY = int(os.getenv('BLOB_UPLOAD_SAS_EXPIRY', 900))  # Seconds a direct upload URL stays valid
+BLOB_UPLOAD_MAX_FILES = int(os.getenv('BLOB_UPLOAD_MAX_FILES', 20))  # Upload URLs per request
+BLOB_CONNECTION_POOL_SIZE = int(os.getenv('BLOB_CONNECTION_POOL_SIZE',
+                                          BLOB_UPLOAD_MAX_WORKERS * BLOB_UPLOAD_MAX_CONCURRENCY))  # Kept-alive connections
+BLOB_CONNECTION_TIMEOUT = int(os.getenv('BLOB_CONNECTION_TIMEOUT', 10))  # Seconds
+BLOB_READ_TIMEOUT = int(os.getenv('BLOB_READ_TIMEOUT', 60))  # Seconds
+BLOB_GC_LEASE = int(os.getenv('BLOB_GC_LEASE', 300))  # Seconds a claimed deletion is hidden from other workers
+BLOB_GC_DELAY = int(os.getenv('BLOB_GC_DELAY', 300))  # Seconds before a released blob may be deleted
+BLOB_GC_MAX_ATTEMPTS = int(os.getenv('BLOB_GC_MAX_ATTEMPTS', 10))
+BLOB_GC_POLL_INTERVAL = float(os.getenv('BLOB_GC_POLL_INTERVAL', 10))  # Seconds
+BLOB_GC_SWEEP_GRACE = int(os.getenv('BLOB_GC_SWEEP_GRACE', 24 * 60 * 60))  # Seconds before an unreferenced blob is swept
+
+
+# Image Variant Settings
+IMAGE_THUMBNAIL_SIZE = int(os.getenv('IMAGE_THUMBNAIL_SIZE', 320))  # Longest edge in pixels
+IMAGE_LARGE_SIZE = int(os.getenv('IMAGE_LARGE_SIZE', 2048))  # Longest edge of the full-size variant
+IMAGE_WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', 80))
+IMAGE_WORKER_BATCH_SIZE = int(os.getenv('IMAGE_WORKER_BATCH_SIZE', 20))  # Products per pass
+IMAGE_WORKER_POLL_INTERVAL = float(os.getenv('IMAGE_WORKER_POLL_INTERVAL', 5))  # Seconds
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -133,6 +235,14 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files (import feeds); must be shared storage when workers run on other hosts
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
+
+# Used when BLOB_STORAGE_BACKEND is 'local'
+BLOB_LOCAL_ROOT = os.getenv('BLOB_LOCAL_ROOT', os.path.join(MEDIA_ROOT, 'blobs'))
+BLOB_LOCAL_URL = os.getenv('BLOB_LOCAL_URL', 'http://127.0.0.1:8000/media/blobs/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -14,12 +14,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from app.user import urls as user_urls
 from app.attribute import urls as attribute_urls
 from app.family import urls as family_urls
 from app.product import urls as product_urls
+from app.upload import urls as upload_urls
+from app.stats import urls as stats_urls
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,5 +31,7 @@ urlpatterns = [
     path('attributes/', include(attribute_urls)),
     path('families/', include(family_urls)),
     path('products/', include(product_urls)),
-]
+    path('uploads/', include(upload_urls)),
+    path('stats/', include(stats_urls)),
+] + static(f'{settings.MEDIA_URL}blobs/', document_root=settings.BLOB_LOCAL_ROOT)  # Local blob backend, DEBUG only
 